@@ -0,0 +1,119 @@
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.management.commands.import_posts import insert_with_dates
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+User = get_user_model()
+
+WORDS = (
+    'утро', 'город', 'кофе', 'дорога', 'книга', 'море', 'письмо',
+    'вечер', 'поезд', 'сад', 'музыка', 'снег', 'окно', 'друг',
+)
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def percentile(timings, rank):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    index = max(0, math.ceil(rank / 100 * len(timings)) - 1)
+    return timings[index]
+
+
+@contextmanager
+def throwaway_database(path=None):
+    """Отдельная база SQLite, как у тестов: рабочие данные не трогаем.
+
+    Без path база создаётся во временном файле и удаляется.
+    """
+    keep = path is not None
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+    old_name = connection.settings_dict['NAME']
+    connection.settings_dict['TEST']['NAME'] = path
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield path
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if not keep and os.path.exists(path):
+            os.unlink(path)
+
+
+def isolated_settings(**extra):
+    """Пустые кеши в памяти процесса и хост тестового клиента."""
+    return {
+        'CACHES': {
+            alias: {'BACKEND': LOCMEM, 'LOCATION': f'bench-{alias}'}
+            for alias in settings.CACHES
+        },
+        'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+        **extra,
+    }
+
+
+class Dataset:
+    """Синтетические авторы, группы и посты для замеров."""
+
+    def __init__(self, rng, posts, users, groups, batch=10_000):
+        self.user = User.objects.create_user(
+            username='bench', first_name='Bench', last_name='Routes'
+        )
+        # Остальным авторам пароль не нужен, хешировать его дорого
+        User.objects.bulk_create(
+            User(username=f'author{number}', password=make_password(None))
+            for number in range(users)
+        )
+        author_ids = list(User.objects.values_list('pk', flat=True))
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description=f'Описание группы {number}',
+            )
+            for number in range(groups)
+        )
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+
+        first_date = timezone.now() - timedelta(minutes=posts)
+        for start in range(0, posts, batch):
+            created = [
+                Post(
+                    text=' '.join(rng.choices(WORDS, k=rng.randint(5, 60))),
+                    author_id=rng.choice(author_ids),
+                    group_id=(
+                        rng.choice(group_ids)
+                        if group_ids and rng.random() < 0.8 else None
+                    ),
+                    pub_date=first_date + timedelta(minutes=number),
+                )
+                for number in range(start, min(start + batch, posts))
+            ]
+            with transaction.atomic():
+                insert_with_dates(created)
+                posts_bulk_created.send(sender=Post, posts=created)
+
+        self.post = (
+            Post.objects.filter(author=self.user).first()
+            or Post.objects.create(text='Пост для замеров', author=self.user)
+        )
+        self.group = (
+            Group.objects.order_by('-posts_count').first()
+            or Group.objects.create(title='Группа', slug='group')
+        )
+        self.summary = (
+            f'{posts} постов, {len(author_ids)} авторов, '
+            f'{len(group_ids)} групп'
+        )
@@ -0,0 +1,40 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:  # без brotli сжимаем только в gzip
+    brotli = None
+
+
+def encodings():
+    """Поддерживаемые кодировки в порядке предпочтения."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, level):
+    """Сжимает байты целиком; level — уровень gzip или качество br."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимает поток по частям, не накапливая его в памяти.
+
+    После каждой части кодировщик сбрасывается, чтобы клиент получал
+    данные сразу, а не после заполнения внутреннего буфера.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if chunk:
+            yield (compressor.compress(chunk)
+                   + compressor.flush(zlib.Z_SYNC_FLUSH))
+    yield compressor.flush()
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import Counter
+
+from django.template.base import Template
+
+_local = threading.local()
+_installed = False
+
+
+class Recorder:
+    """Замеры одного запроса: SQL, шаблоны и обращения к кешам."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache = Counter()
+        self.extra = {}
+
+    def sql(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def start():
+    _local.recorder = Recorder()
+    return _local.recorder
+
+
+def stop():
+    _local.recorder = None
+
+
+def current():
+    """Замеры текущего запроса или None, если замер не идёт."""
+    return getattr(_local, 'recorder', None)
+
+
+def cache_hit(name):
+    recorder = current()
+    if recorder is not None:
+        recorder.cache[f'{name}.hit'] += 1
+
+
+def cache_miss(name):
+    recorder = current()
+    if recorder is not None:
+        recorder.cache[f'{name}.miss'] += 1
+
+
+def record(name, value):
+    """Произвольная метрика запроса, например степень сжатия."""
+    recorder = current()
+    if recorder is not None:
+        recorder.extra[name] = value
+
+
+def install():
+    """Подключает замер времени отрисовки шаблонов.
+
+    Считается только внешний шаблон: extends и include отрисовываются
+    внутри него и уже входят в его время.
+    """
+    global _installed
+    if _installed:
+        return
+    original = Template._render
+
+    def _render(self, context):
+        recorder = current()
+        if recorder is None or recorder.template_depth:
+            return original(self, context)
+        recorder.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            recorder.template_depth -= 1
+            recorder.template_ms += (time.perf_counter() - started) * 1000
+
+    Template._render = _render
+    _installed = True
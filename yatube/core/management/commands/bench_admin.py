@@ -0,0 +1,150 @@
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.benchmark import (Dataset, isolated_settings, percentile,
+                            throwaway_database)
+from posts.admin import GroupAdmin, PostAdmin
+from posts.models import Group, Post
+
+# Настройки админки до оптимизации: Django по умолчанию
+LEGACY = {
+    Post: {
+        'list_select_related': False,
+        'paginator': Paginator,
+        'show_full_result_count': True,
+        'autocomplete_fields': (),
+        'date_hierarchy': None,
+        'formfield_for_foreignkey': (
+            admin.ModelAdmin.formfield_for_foreignkey
+        ),
+        'get_changelist_formset': admin.ModelAdmin.get_changelist_formset,
+    },
+    Group: {
+        'paginator': Paginator,
+        'show_full_result_count': True,
+    },
+}
+CLASSES = {Post: PostAdmin, Group: GroupAdmin}
+
+
+@contextmanager
+def legacy_admin():
+    """Временно возвращает PostAdmin и GroupAdmin настройки Django."""
+    saved = {}
+    for model, attributes in LEGACY.items():
+        model_admin = CLASSES[model]
+        saved[model] = {name: model_admin.__dict__.get(name)
+                        for name in attributes}
+        for name, value in attributes.items():
+            setattr(model_admin, name, value)
+    try:
+        yield
+    finally:
+        for model, attributes in saved.items():
+            for name, value in attributes.items():
+                if value is None:
+                    delattr(CLASSES[model], name)
+                else:
+                    setattr(CLASSES[model], name, value)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу и замеряет списки постов и групп в '
+        'админке: с поиском, фильтрами, глубокой страницей и '
+        'автодополнением групп. --mode legacy возвращает настройки '
+        'Django по умолчанию для сравнения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--mode', choices=('legacy', 'tuned', 'both'), default='both'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        with throwaway_database(), override_settings(**isolated_settings()):
+            dataset = Dataset(
+                random.Random(options['seed']), options['posts'],
+                options['users'], options['groups'],
+            )
+            self.stdout.write(f'База: {dataset.summary}')
+            dataset.user.is_staff = dataset.user.is_superuser = True
+            dataset.user.save()
+            client = Client()
+            client.force_login(dataset.user)
+            urls = self.urls(dataset)
+
+            self.stdout.write(
+                f'{"режим":<8}{"адрес":<34}{"p50":>9}{"p95":>9}'
+                f'{"SQL":>6}{"байт":>10}'
+            )
+            modes = ('legacy', 'tuned')
+            if options['mode'] != 'both':
+                modes = (options['mode'],)
+            for mode in modes:
+                for name, url in urls.items():
+                    if mode == 'legacy':
+                        with legacy_admin():
+                            result = self.measure(client, url, options)
+                    else:
+                        result = self.measure(client, url, options)
+                    self.report(mode, name, result)
+
+    def urls(self, dataset):
+        changelist = reverse('admin:posts_post_changelist')
+        last_page = max(Post.objects.count() // PostAdmin.list_per_page, 1)
+        return {
+            'посты': changelist,
+            'посты: поиск': f'{changelist}?q=кофе',
+            'посты: группа': (
+                f'{changelist}?group__id__exact={dataset.group.pk}'
+            ),
+            'посты: год': (
+                f'{changelist}?pub_date__year={dataset.post.pub_date.year}'
+            ),
+            'посты: глубокая страница': f'{changelist}?p={last_page - 1}',
+            'группы': reverse('admin:posts_group_changelist'),
+            'группы: автодополнение': (
+                reverse('admin:posts_group_autocomplete') + '?term=Группа'
+            ),
+        }
+
+    def measure(self, client, url, options):
+        timings, queries, size = [], 0, 0
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries, size = len(captured), len(response.content)
+        timings.sort()
+        return {
+            'p50': percentile(timings, 50),
+            'p95': percentile(timings, 95),
+            'queries': queries,
+            'bytes': size,
+            'status': response.status_code,
+        }
+
+    def report(self, mode, name, result):
+        status = '' if result['status'] == 200 else f'  {result["status"]}'
+        self.stdout.write(
+            f'{mode:<8}{name:<34}{result["p50"]:>9.2f}{result["p95"]:>9.2f}'
+            f'{result["queries"]:>6}{result["bytes"]:>10}{status}'
+        )
@@ -0,0 +1,129 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import compression
+from core.benchmark import Dataset, isolated_settings, throwaway_database
+
+
+def levels(value):
+    try:
+        return [int(level) for level in value.split(',')]
+    except ValueError:
+        raise CommandError(f'Уровни через запятую, а не {value!r}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает ленты и страницу поста на временной базе и '
+        'сравнивает уровни gzip и brotli: процессорное время на сжатие '
+        'против сэкономленных байтов, целиком и потоком по частям'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2_000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз сжимать каждую страницу',
+        )
+        parser.add_argument('--gzip-levels', type=levels, default='1,6,9')
+        parser.add_argument(
+            '--brotli-qualities', type=levels, default='1,5,11'
+        )
+        parser.add_argument(
+            '--chunk', type=int, default=8192,
+            help='Размер части при потоковом сжатии, байт',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['chunk'] < 1:
+            raise CommandError('--repeat и --chunk должны быть больше нуля')
+        with override_settings(**isolated_settings()), throwaway_database():
+            pages = self.render_pages(options)
+        for name, body in pages.items():
+            self.stdout.write(f'{name:<24}{len(body):>10} байт')
+
+        settings_to_try = [
+            ('gzip', level) for level in options['gzip_levels']
+        ]
+        if 'br' in compression.encodings():
+            settings_to_try += [
+                ('br', quality) for quality in options['brotli_qualities']
+            ]
+        else:
+            self.stdout.write('brotli не установлен, br пропущен')
+
+        self.stdout.write(
+            f'\n{"кодировка":<10}{"уровень":>8}{"режим":>8}'
+            f'{"байт":>10}{"сжато":>10}{"степень":>9}'
+            f'{"CPU мс":>9}{"КБ/мс":>8}'
+        )
+        original = sum(len(body) for body in pages.values())
+        for encoding, level in settings_to_try:
+            for mode in ('whole', 'stream'):
+                size, cpu_ms = self.measure(
+                    pages.values(), encoding, level, mode, options
+                )
+                saved_kb = (original - size) / 1024
+                self.stdout.write(
+                    f'{encoding:<10}{level:>8}{mode:>8}'
+                    f'{original:>10}{size:>10}{original / size:>9.2f}'
+                    f'{cpu_ms:>9.3f}{saved_kb / max(cpu_ms, 1e-6):>8.1f}'
+                )
+
+    def render_pages(self, options):
+        dataset = Dataset(
+            random.Random(options['seed']), options['posts'],
+            options['users'], options['groups'],
+        )
+        client = Client()
+        client.force_login(dataset.user)
+        urls = {
+            'posts:main_page': reverse('posts:main_page'),
+            'posts:posts_by_groups': reverse(
+                'posts:posts_by_groups', args=[dataset.group.slug]
+            ),
+            'posts:profile': reverse(
+                'posts:profile', args=[dataset.user.username]
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', args=[dataset.post.pk]
+            ),
+        }
+        pages = {}
+        for name, url in urls.items():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{name}: {response.status_code}')
+            pages[name] = response.content
+        return pages
+
+    def measure(self, bodies, encoding, level, mode, options):
+        """Размер всех страниц после сжатия и CPU мс на их сжатие."""
+        bodies = list(bodies)
+        chunk = options['chunk']
+        size = 0
+        started = time.process_time()
+        for _ in range(options['repeat']):
+            size = 0
+            for body in bodies:
+                if mode == 'whole':
+                    size += len(compression.compress(body, encoding, level))
+                    continue
+                parts = (
+                    body[start:start + chunk]
+                    for start in range(0, len(body), chunk)
+                )
+                size += sum(
+                    len(part) for part in
+                    compression.compress_stream(parts, encoding, level)
+                )
+        cpu = (time.process_time() - started) * 1000
+        return size, cpu / options['repeat']
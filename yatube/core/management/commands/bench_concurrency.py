@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmark import (Dataset, isolated_settings, percentile,
+                            throwaway_database)
+
+# Настройки SQLite по умолчанию: журнал отката и полная синхронизация
+ROLLBACK_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Worker(threading.Thread):
+    """Поток, который до дедлайна повторяет запрос и копит замеры."""
+
+    def __init__(self, client, request, deadline):
+        super().__init__(daemon=True)
+        self.client = client
+        self.request = request
+        self.deadline = deadline
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while time.perf_counter() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    self.request(self.client)
+                except DatabaseError:
+                    self.errors += 1
+                    continue
+                self.timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет чтение лент несколькими потоками, пока другой поток '
+        'создаёт посты через post_create: журнал отката против '
+        'SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20_000)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument(
+            '--duration', type=float, default=10.0, help='Секунд на режим'
+        )
+        parser.add_argument(
+            '--mode', choices=('rollback', 'tuned', 'both'), default='both'
+        )
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if options['readers'] < 1 or options['duration'] <= 0:
+            raise CommandError('Нужен хотя бы один читатель и время замера')
+        modes = {
+            'rollback': ROLLBACK_PRAGMAS,
+            'tuned': settings.SQLITE_PRAGMAS,
+        }
+        if options['mode'] != 'both':
+            modes = {options['mode']: modes[options['mode']]}
+        self.stdout.write(
+            f'{"режим":<10}{"чтений/с":>10}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"записей/с":>11}{"p95":>9}{"ошибок":>8}'
+        )
+        for mode, pragmas in modes.items():
+            # Чтения должны доходить до базы, а не до кеша страниц
+            with override_settings(**isolated_settings(
+                SQLITE_PRAGMAS=pragmas, POSTS_PAGE_CACHE_TIMEOUT=0
+            )), throwaway_database():
+                self.report(mode, self.run_mode(options))
+
+    def run_mode(self, options):
+        dataset = Dataset(
+            random.Random(options['seed']), options['posts'],
+            options['users'], options['groups'],
+        )
+        # Потоки откроют свои соединения к уже заполненной базе
+        connections.close_all()
+        urls = [
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', args=[dataset.group.slug]),
+            reverse('posts:profile', args=[dataset.user.username]),
+        ]
+        create_url = reverse('posts:post_create')
+        rng = random.Random(options['seed'])
+
+        def read(client):
+            client.get(rng.choice(urls))
+
+        def write(client):
+            response = client.post(create_url, {'text': 'Новый пост'})
+            if response.status_code != 302:
+                raise DatabaseError(f'post_create: {response.status_code}')
+
+        deadline = time.perf_counter() + options['duration']
+        readers = [
+            Worker(Client(), read, deadline)
+            for _ in range(options['readers'])
+        ]
+        writers = []
+        for _ in range(options['writers']):
+            client = Client()
+            client.force_login(dataset.user)
+            writers.append(Worker(client, write, deadline))
+        connections.close_all()
+        for worker in readers + writers:
+            worker.start()
+        for worker in readers + writers:
+            worker.join()
+        return readers, writers, options['duration']
+
+    def report(self, mode, result):
+        readers, writers, duration = result
+        reads = sorted(t for worker in readers for t in worker.timings)
+        writes = sorted(t for worker in writers for t in worker.timings)
+        errors = sum(worker.errors for worker in readers + writers)
+
+        def rank(timings, value):
+            return percentile(timings, value) if timings else 0.0
+
+        self.stdout.write(
+            f'{mode:<10}{len(reads) / duration:>10.1f}'
+            f'{rank(reads, 50):>9.2f}{rank(reads, 95):>9.2f}'
+            f'{rank(reads, 99):>9.2f}{len(writes) / duration:>11.1f}'
+            f'{rank(writes, 95):>9.2f}{errors:>8}'
+        )
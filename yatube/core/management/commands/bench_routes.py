@@ -0,0 +1,231 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.benchmark import (Dataset, isolated_settings, percentile,
+                            throwaway_database)
+
+NAMESPACES = ('posts', 'users', 'about')
+ROLES = ('guest', 'user')
+PERCENTILES = (50, 95, 99)
+# После этих адресов клиент теряет сессию, её нужно вернуть
+LOGOUT_ROUTES = {'users:logout'}
+# Параметры запроса, без которых адрес отдаёт пустую страницу
+QUERY_STRINGS = {
+    'posts:search': '?q=кофе',
+    'posts:group_search': '?q=Группа',
+}
+
+
+def routes():
+    """Пары (имя адреса, имена параметров) для приложений NAMESPACES."""
+    for entry in get_resolver().url_patterns:
+        if not isinstance(entry, URLResolver):
+            continue
+        if entry.namespace not in NAMESPACES:
+            continue
+        for pattern in entry.url_patterns:
+            yield (
+                f'{entry.namespace}:{pattern.name}',
+                list(pattern.pattern.converters),
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу и замеряет адреса posts, users и about '
+        'для гостя и авторизованного пользователя: p50/p95/p99, SQL-запросы '
+        'и размер ответа. С --baseline падает при регрессии'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--batch', type=int, default=10_000)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--route', action='append', default=[],
+            help='Замерять только эти адреса (posts:main_page); можно '
+                 'указать несколько раз',
+        )
+        parser.add_argument('--output', help='Куда записать отчёт в JSON')
+        parser.add_argument(
+            '--baseline', help='Отчёт прошлого прогона для сравнения'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=1.25,
+            help='Допустимый рост p95 относительно baseline, во сколько раз',
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=1.0,
+            help='Рост p95 меньше стольких мс регрессией не считается',
+        )
+        parser.add_argument(
+            '--db', help='Файл базы; по умолчанию временный и удаляется'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        baseline = self.read_baseline(options['baseline'])
+        with throwaway_database(options['db']), override_settings(
+            **isolated_settings()
+        ):
+            self.seed(options)
+            report = self.measure(options)
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if baseline is not None:
+            regressions = self.compare(report, baseline, options)
+            if regressions:
+                raise CommandError(
+                    'Регрессия относительно baseline:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def read_baseline(self, path):
+        if not path:
+            return None
+        try:
+            with open(path, encoding='utf-8') as baseline:
+                return json.load(baseline)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def seed(self, options):
+        started = time.perf_counter()
+        dataset = Dataset(
+            random.Random(options['seed']), options['posts'],
+            options['users'], options['groups'], options['batch'],
+        )
+        self.user, self.post, self.group = (
+            dataset.user, dataset.post, dataset.group
+        )
+        self.stdout.write(
+            f'База: {dataset.summary} за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def url_kwargs(self, params):
+        values = {
+            'slug': self.group.slug,
+            'username': self.user.username,
+            'post_id': self.post.pk,
+            'year': self.post.pub_date.year,
+            'month': self.post.pub_date.month,
+            'uidb64': urlsafe_base64_encode(force_bytes(self.user.pk)),
+            'token': default_token_generator.make_token(self.user),
+        }
+        return {param: values[param] for param in params}
+
+    def clients(self):
+        user = Client()
+        user.force_login(self.user)
+        return {'guest': Client(), 'user': user}
+
+    def request(self, client, url):
+        """Один запрос: (время в мс, число запросов, байты, статус)."""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, len(queries), size, response.status_code
+
+    def measure(self, options):
+        clients = self.clients()
+        selected = set(options['route'])
+        results = {}
+        for name, params in routes():
+            if selected and name not in selected:
+                continue
+            url = reverse(name, kwargs=self.url_kwargs(params))
+            url += QUERY_STRINGS.get(name, '')
+            for role in ROLES:
+                client = clients[role]
+                samples = []
+                for number in range(options['warmup'] + options['requests']):
+                    sample = self.request(client, url)
+                    if name in LOGOUT_ROUTES and role == 'user':
+                        client.force_login(self.user)
+                    if number >= options['warmup']:
+                        samples.append(sample)
+                results[f'{name} [{role}]'] = self.summary(url, samples)
+        return {
+            'meta': {
+                'posts': options['posts'],
+                'users': options['users'],
+                'groups': options['groups'],
+                'requests': options['requests'],
+                'vendor': connection.vendor,
+            },
+            'routes': results,
+        }
+
+    def summary(self, url, samples):
+        timings = sorted(elapsed for elapsed, _, _, _ in samples)
+        queries = [count for _, count, _, _ in samples]
+        result = {'url': url}
+        for rank in PERCENTILES:
+            result[f'p{rank}_ms'] = round(percentile(timings, rank), 3)
+        result.update({
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': max(queries),
+            'queries_median': statistics.median(queries),
+            'bytes': max(size for _, _, size, _ in samples),
+            'status': sorted({status for _, _, _, status in samples}),
+        })
+        return result
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"адрес":<42}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>6}{"байт":>10}  статус'
+        )
+        for name, result in report['routes'].items():
+            self.stdout.write(
+                f'{name:<42}{result["p50_ms"]:>9.2f}'
+                f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                f'{result["queries"]:>6}{result["bytes"]:>10}  '
+                f'{",".join(map(str, result["status"]))}'
+            )
+
+    def compare(self, report, baseline, options):
+        """Адреса, у которых вырос p95 или число SQL-запросов."""
+        regressions = []
+        previous = baseline.get('routes', {})
+        for name, result in report['routes'].items():
+            if name not in previous:
+                continue
+            before = previous[name]
+            p95, was = result['p95_ms'], before['p95_ms']
+            if (p95 > was * options['threshold']
+                    and p95 - was > options['min_delta']):
+                regressions.append(
+                    f'{name}: p95 {was:.2f} → {p95:.2f} мс'
+                )
+            if result['queries'] > before['queries']:
+                regressions.append(
+                    f'{name}: SQL {before["queries"]} → {result["queries"]}'
+                )
+        return regressions
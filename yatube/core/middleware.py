@@ -0,0 +1,335 @@
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import (MiddlewareNotUsed,
+                                    SuspiciousFileOperation)
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import slugify
+from django.views.static import was_modified_since
+
+from . import compression, instrumentation, routers
+from .profiling import Profile
+
+logger = logging.getLogger('core.timing')
+
+
+class ServerTimingMiddleware:
+    """Время запроса, SQL, шаблонов и кешей в Server-Timing и в лог.
+
+    Включается настройкой REQUEST_TIMING; без неё middleware
+    не подключается вовсе. Тело потокового ответа отдаётся уже после
+    выхода из middleware, поэтому его запросы в замер не попадают.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        instrumentation.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = instrumentation.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(recorder.sql)
+                    )
+                response = self.get_response(request)
+        finally:
+            instrumentation.stop()
+        total = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        view = match.view_name if match else ''
+        response['Server-Timing'] = self.header(recorder, total)
+        fields = {
+            'view': view or '-',
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'sql_count': recorder.sql_count,
+            'sql_ms': round(recorder.sql_ms, 2),
+            'template_ms': round(recorder.template_ms, 2),
+            **recorder.cache,
+            **recorder.extra,
+        }
+        logger.info(
+            ' '.join(f'{name}={value}' for name, value in fields.items()),
+            extra={'timing': fields},
+        )
+        return response
+
+    def header(self, recorder, total):
+        metrics = [
+            f'total;dur={total:.2f}',
+            f'sql;dur={recorder.sql_ms:.2f};desc="{recorder.sql_count} SQL"',
+            f'template;dur={recorder.template_ms:.2f}',
+        ]
+        for name, value in (*sorted(recorder.cache.items()),
+                            *recorder.extra.items()):
+            metrics.append(f'{name};desc="{value}"')
+        return ', '.join(metrics)
+
+
+class ProfilingMiddleware:
+    """Профиль запроса по требованию сотрудника и выборочно.
+
+    Сотрудник получает профиль вместо страницы через параметр
+    _profile (или заголовок X-Profile): stats — таблица cProfile,
+    collapsed — стеки для flame graph, save — страница как обычно,
+    а профиль сохраняется в PROFILE_DIR. Доля PROFILE_SAMPLE_RATE
+    обычных запросов сохраняется туда же; хранятся последние
+    PROFILE_KEEP профилей. Ставится после AuthenticationMiddleware.
+    """
+
+    MODES = ('stats', 'collapsed', 'save')
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get('_profile') or request.META.get(
+            'HTTP_X_PROFILE'
+        )
+        if mode not in self.MODES or not request.user.is_staff:
+            mode = None
+            if random.random() < settings.PROFILE_SAMPLE_RATE:
+                mode = 'save'
+        if mode is None:
+            return self.get_response(request)
+
+        profile = Profile()
+        response = profile.run(self.get_response, request)
+        if mode == 'stats':
+            return HttpResponse(
+                profile.stats(request.GET.get('_profile_sort')),
+                content_type='text/plain; charset=utf-8',
+            )
+        if mode == 'collapsed':
+            return HttpResponse(
+                profile.sampler.collapsed(),
+                content_type='text/plain; charset=utf-8',
+            )
+        name = profile.save(
+            settings.PROFILE_DIR,
+            slugify(request.path.replace('/', '-')) or 'root',
+            settings.PROFILE_KEEP,
+        )
+        if request.user.is_staff:
+            response['X-Profile'] = name
+        return response
+
+
+class ReplicaMiddleware:
+    """Направляет представления REPLICA_VIEWS в реплики на чтение.
+
+    После запроса с записью в базу клиент получает cookie, и
+    REPLICA_PIN_SECONDS секунд все его запросы читают из основной
+    базы: так он сразу видит свои изменения, даже если реплика
+    отстаёт.
+    """
+
+    PIN_COOKIE = 'primary_pin'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.reset()
+        if wrote:
+            response.set_cookie(
+                self.PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method in ('GET', 'HEAD')
+                and request.resolver_match.view_name in settings.REPLICA_VIEWS
+                and self.PIN_COOKIE not in request.COOKIES):
+            routers.use_replica(random.choice(settings.DATABASE_REPLICAS))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отключённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Из заранее сжатых collectstatic копий выбирается та, что
+    принимает клиент (br, затем gzip). Файлы с хешем в имени
+    неизменны и кешируются браузером на STATIC_IMMUTABLE_MAX_AGE,
+    остальные — на STATIC_MAX_AGE с проверкой If-Modified-Since.
+    Ставится первым, чтобы статика не проходила через остальные
+    middleware.
+    """
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not (getattr(settings, 'SERVE_STATIC', False)
+                and settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        # Имена с хешем из манифеста collectstatic
+        manifest = getattr(staticfiles_storage, 'load_manifest', dict)()
+        self.immutable = set(manifest.values())
+
+    def __call__(self, request):
+        if (request.method not in ('GET', 'HEAD')
+                or not request.path_info.startswith(self.prefix)):
+            return self.get_response(request)
+        name = request.path_info[len(self.prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not name or not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        stat = os.stat(path)
+        immutable = name in self.immutable
+        if not immutable and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size,
+        ):
+            return HttpResponseNotModified()
+
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        variants = {
+            coding: path + suffix for coding, suffix in self.ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+        encoding = next(
+            (coding for coding in variants if coding in accepted), None
+        )
+        response = FileResponse(open(variants.get(encoding, path), 'rb'))
+        content_type, _ = mimetypes.guess_type(name)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if immutable:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, '
+                'immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы в br или gzip по Accept-Encoding.
+
+    Ответы короче COMPRESSION_MIN_SIZE не сжимаются: заголовки
+    съедят выигрыш. Потоковые ответы сжимаются по частям без
+    буферизации. Степень сжатия попадает в Server-Timing как
+    compression; у потока она заранее неизвестна, поэтому там
+    указывается только кодировка. Ставится после
+    ServerTimingMiddleware.
+    """
+
+    TYPES = ('text/', 'application/json', 'application/javascript',
+             'application/xml')
+    # RSS, Atom, JSON Feed, SVG и прочие типы на основе XML и JSON
+    SUFFIXES = ('+xml', '+json')
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'RESPONSE_COMPRESSION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.levels = {
+            'gzip': settings.COMPRESSION_LEVEL,
+            'br': settings.COMPRESSION_BROTLI_QUALITY,
+        }
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.has_header('Content-Encoding')
+                or not self.compressible(response.get('Content-Type', ''))):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = next(
+            (coding for coding in compression.encodings()
+             if coding in accepted), None
+        )
+        if encoding is None:
+            return response
+
+        level = self.levels[encoding]
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, level
+            )
+            del response['Content-Length']
+            instrumentation.record('compression', f'{encoding} stream')
+        else:
+            content = compression.compress(response.content, encoding, level)
+            if len(content) >= len(response.content):
+                return response
+            instrumentation.record(
+                'compression',
+                f'{encoding} {len(response.content) / len(content):.2f}',
+            )
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        # Сжатое тело уже не совпадает байт в байт с исходным
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressible(self, content_type):
+        mime = content_type.split(';')[0].strip().lower()
+        return mime.startswith(self.TYPES) or mime.endswith(self.SUFFIXES)
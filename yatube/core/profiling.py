@@ -0,0 +1,103 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Sampler:
+    """Снимает стек потока с заданным шагом для flame graph.
+
+    cProfile знает только пары «кто кого вызвал», поэтому полные
+    стеки собираются отдельным потоком по sys._current_frames().
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = frame.f_globals.get('__name__', '?')
+                stack.append(f'{module}.{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Стеки в формате flamegraph.pl: «a;b;c число»."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+
+class Profile:
+    """cProfile и сэмплер стеков вокруг одного вызова."""
+
+    def __init__(self, interval=0.001):
+        self.profiler = cProfile.Profile()
+        self.sampler = Sampler(threading.get_ident(), interval)
+
+    def run(self, function, *args):
+        self.sampler.start()
+        self.profiler.enable()
+        try:
+            return function(*args)
+        finally:
+            self.profiler.disable()
+            self.sampler.stop()
+
+    def stats(self, sort='cumulative', limit=80):
+        if sort not in SORT_KEYS:
+            sort = SORT_KEYS[0]
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(
+            sort
+        ).print_stats(limit)
+        return output.getvalue()
+
+    def save(self, directory, name, keep):
+        """Пишет .prof и .collapsed и оставляет keep последних профилей."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(
+            directory,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid4().hex[:8]}-{name}'
+        )
+        self.profiler.dump_stats(f'{base}.prof')
+        with open(f'{base}.collapsed', 'w') as collapsed:
+            collapsed.write(self.sampler.collapsed())
+        rotate(directory, keep)
+        return os.path.basename(base)
+
+
+def rotate(directory, keep):
+    profiles = sorted(
+        (entry for entry in os.scandir(directory)
+         if entry.name.endswith('.prof')),
+        key=lambda entry: (entry.stat().st_mtime, entry.name),
+    )
+    for entry in profiles[:max(0, len(profiles) - keep)]:
+        base = entry.path[:-len('.prof')]
+        for path in (entry.path, f'{base}.collapsed'):
+            if os.path.exists(path):
+                os.unlink(path)
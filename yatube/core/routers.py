@@ -0,0 +1,42 @@
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def use_replica(alias):
+    """Чтения текущего запроса идут в реплику alias."""
+    _state.replica = alias
+
+
+def reset():
+    """Сбрасывает состояние запроса; True, если в нём была запись."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.replica = None
+    _state.wrote = False
+    return wrote
+
+
+class ReplicaRouter:
+    """Чтения представлений только для чтения — в реплику.
+
+    Реплику выбирает core.middleware.ReplicaMiddleware. Всё остальное,
+    включая любые чтения после первой записи в запросе, идёт
+    в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'wrote', False):
+            return None
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,30 @@
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+VALUE = re.compile(r'^-?\w+$')
+
+
+def sqlite_pragmas():
+    """PRAGMA из SQLITE_PRAGMAS; значения — числа или слова."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    for name, value in pragmas.items():
+        if not name.isidentifier() or not VALUE.match(str(value)):
+            raise ValueError(f'Недопустимая PRAGMA {name}={value!r}')
+        yield f'PRAGMA {name} = {value}'
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite.
+
+    journal_mode=WAL хранится в самом файле базы, остальные
+    настройки действуют только в пределах соединения.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in sqlite_pragmas():
+            cursor.execute(statement)
@@ -0,0 +1,52 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from . import compression
+
+# Картинки в png и jpeg уже сжаты, повторное сжатие их только раздует
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml')
+# Копия, сэкономившая меньше 5%, не стоит лишнего чтения с диска
+MIN_RATIO = 0.95
+# Сжатие при сборке однократно, поэтому уровни максимальные
+VARIANTS = {'br': ('.br', 11), 'gzip': ('.gz', 9)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми .gz и .br копиями.
+
+    collectstatic пишет рядом с каждым текстовым файлом его сжатые
+    варианты; отдаёт их PrecompressedStaticMiddleware. Пока статика
+    не собрана (разработка, тесты), {% static %} возвращает исходное
+    имя вместо ошибки.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for encoding in compression.encodings():
+            suffix, level = VARIANTS[encoding]
+            packed = compression.compress(data, encoding, level)
+            if len(packed) > len(data) * MIN_RATIO:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            yield self._save(name + suffix, ContentFile(packed))
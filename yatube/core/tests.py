@@ -0,0 +1,398 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts.models import Post
+
+from .middleware import (CompressionMiddleware, ReplicaMiddleware,
+                         ServerTimingMiddleware, accepted_encodings)
+from .routers import ReplicaRouter
+from .signals import sqlite_pragmas
+
+User = get_user_model()
+
+
+class ServerTimingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Timing')
+        Post.objects.create(text='Замер', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит время запроса, SQL и шаблонов"""
+        response = self.guest_client.get(reverse('posts:main_page'))
+        header = response['Server-Timing']
+        for metric in ('total;dur=', 'sql;dur=', 'template;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        self.assertNotIn('desc="0 SQL"', header)
+
+    def test_page_cache_hits_and_misses(self):
+        """Промах и попадание в кеш страниц попадают в замер"""
+        url = reverse('posts:profile', args=[self.user.username])
+        first = self.guest_client.get(url)
+        second = self.guest_client.get(url)
+        self.assertIn('page_cache.miss;desc="1"', first['Server-Timing'])
+        self.assertIn('page_cache.hit;desc="1"', second['Server-Timing'])
+
+    def test_log_line_names_view(self):
+        """Строка лога помечена именем адреса"""
+        url = reverse('posts:profile', args=[self.user.username])
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.guest_client.get(url)
+        self.assertIn('view=posts:profile', logs.output[0])
+        record = logs.records[0]
+        self.assertEqual(record.timing['status'], 200)
+        self.assertGreater(record.timing['sql_count'], 0)
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled(self):
+        """Без REQUEST_TIMING middleware не подключается"""
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(lambda request: None)
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        cls.user = User.objects.create_user(username='Regular')
+        Post.objects.create(text='Профиль', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        self.url = reverse('posts:main_page')
+
+    def test_staff_gets_stats(self):
+        """Сотрудник получает таблицу cProfile вместо страницы"""
+        response = self.staff_client.get(self.url, {'_profile': 'stats'})
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn('cumulative', response.content.decode())
+        self.assertIn('views.py', response.content.decode())
+
+    def test_collapsed_by_header(self):
+        """Заголовок X-Profile отдаёт стеки для flame graph"""
+        response = self.staff_client.get(
+            self.url, HTTP_X_PROFILE='collapsed'
+        )
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertNotIn('<html', response.content.decode())
+
+    def test_regular_user_gets_page(self):
+        """Не сотрудник профиль не получает"""
+        response = self.user_client.get(self.url, {'_profile': 'stats'})
+        self.assertIn('page_obj', response.context)
+
+    def test_sampled_requests_rotate(self):
+        """Выборочные профили сохраняются и ротируются"""
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(PROFILE_SAMPLE_RATE=1, PROFILE_DIR=directory,
+                               PROFILE_KEEP=2):
+                for _ in range(3):
+                    response = self.user_client.get(self.url)
+                    self.assertNotIn('X-Profile', response)
+                response = self.staff_client.get(
+                    self.url, {'_profile': 'save'}
+                )
+                self.assertIn('page_obj', response.context)
+                self.assertIn(response['X-Profile'] + '.prof',
+                              os.listdir(directory))
+            names = sorted(os.listdir(directory))
+        self.assertEqual(len(names), 4)
+        self.assertEqual(
+            {name.rsplit('.', 1)[1] for name in names}, {'prof', 'collapsed'}
+        )
+
+
+class CompressionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Compressor')
+        Post.objects.create(text='Сжатие', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_page_compressed_and_ratio_reported(self):
+        """Страница сжимается, степень сжатия видна в Server-Timing"""
+        response = Client().get(
+            reverse('posts:main_page'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertIn('Сжатие', gzip.decompress(response.content).decode())
+        self.assertIn('compression;desc="gzip ', response['Server-Timing'])
+
+    def test_not_compressed_without_accept_encoding(self):
+        response = Client().get(reverse('posts:main_page'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response_skipped(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse('ok'))
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(middleware(request).has_header('Content-Encoding'))
+
+    def test_streaming_compressed_chunk_by_chunk(self):
+        """Поток сжимается по частям, каждая часть отдаётся сразу"""
+        chunks = [
+            f'<p>Часть {number}</p>'.encode() * 50 for number in range(3)
+        ]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks))
+        )
+        response = middleware(
+            self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        parts = list(response.streaming_content)
+        self.assertEqual(len(parts), len(chunks) + 1)
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+    def test_feed_compressed_and_revalidated(self):
+        """Лента RSS сжимается потоком и отвечает 304 на слабый ETag"""
+        client = Client()
+        url = reverse('posts:feed')
+        for fmt in ('rss', 'atom', 'json'):
+            with self.subTest(fmt=fmt):
+                response = client.get(
+                    url, {'format': fmt}, HTTP_ACCEPT_ENCODING='gzip'
+                )
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                body = gzip.decompress(b''.join(response.streaming_content))
+                self.assertIn('Сжатие', body.decode())
+                self.assertTrue(response['ETag'].startswith('W/'))
+                again = client.get(
+                    url, {'format': fmt}, HTTP_ACCEPT_ENCODING='gzip',
+                    HTTP_IF_NONE_MATCH=response['ETag'],
+                )
+                self.assertEqual(again.status_code, 304)
+
+    @override_settings(RESPONSE_COMPRESSION=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            CompressionMiddleware(lambda request: None)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Выбор базы для чтения без обращений к самим базам"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.read_from = []
+
+    def get_response(self, request, write=False):
+        match = request.resolver_match
+        self.middleware.process_view(
+            request, match.func, match.args, match.kwargs
+        )
+        if write:
+            self.router.db_for_write(Post)
+        self.read_from.append(self.router.db_for_read(Post))
+        return HttpResponse()
+
+    def run_request(self, request, write=False):
+        self.middleware = ReplicaMiddleware(
+            lambda request: self.get_response(request, write)
+        )
+        request.resolver_match = resolve(request.path)
+        return self.middleware(request)
+
+    def test_read_only_views_use_replica(self):
+        """Главная и about читают из реплики, создание поста — нет"""
+        urls = {
+            reverse('posts:main_page'): 'replica',
+            reverse('about:tech'): 'replica',
+            reverse('posts:post_create'): None,
+        }
+        for url, alias in urls.items():
+            with self.subTest(url=url):
+                self.run_request(self.factory.get(url))
+                self.assertEqual(self.read_from[-1], alias)
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_post_uses_primary(self):
+        self.run_request(self.factory.post(reverse('posts:main_page')))
+        self.assertIsNone(self.read_from[-1])
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает свои изменения из основной базы"""
+        response = self.run_request(
+            self.factory.get(reverse('posts:main_page')), write=True
+        )
+        self.assertIsNone(self.read_from[-1])
+        pin = response.cookies[ReplicaMiddleware.PIN_COOKIE]
+        self.assertTrue(pin['max-age'])
+
+        request = self.factory.get(reverse('posts:main_page'))
+        request.COOKIES[ReplicaMiddleware.PIN_COOKIE] = pin.value
+        response = self.run_request(request)
+        self.assertIsNone(self.read_from[-1])
+        self.assertNotIn(ReplicaMiddleware.PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_disabled_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaMiddleware(lambda request: None)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Запросы на самом деле идут во вторую базу.
+
+    В тестах replica — отдельное соединение, зеркало default:
+    данные общие, а запросы видны по соединению.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Replicated')
+        Post.objects.create(text='Со второй базы', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def request(self, method, url, data=None):
+        """Ответ и SQL, выполненные в основной базе и в реплике."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data)
+        return response, primary.captured_queries, replica.captured_queries
+
+    def post_queries(self, queries):
+        return [query for query in queries
+                if '"posts_post"' in query['sql']
+                and query['sql'].startswith('SELECT')]
+
+    def test_get_reads_replica_and_write_pins_primary(self):
+        url = reverse('posts:main_page')
+        # Первый запрос заводит ленивые счётчики: это запись,
+        # после которой клиент читал бы из основной базы
+        Client().get(url)
+        response, primary, replica = self.request('get', url)
+        self.assertContains(response, 'Со второй базы')
+        self.assertTrue(self.post_queries(replica))
+        self.assertFalse(self.post_queries(primary))
+
+        response, _, _ = self.request(
+            'post', reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(ReplicaMiddleware.PIN_COOKIE, response.cookies)
+
+        response, primary, replica = self.request('get', url)
+        self.assertContains(response, 'Новый пост')
+        self.assertEqual(replica, [])
+        self.assertTrue(self.post_queries(primary))
+
+
+class SqlitePragmaTests(TestCase):
+
+    def test_pragmas_applied(self):
+        """Соединение получает настройки из SQLITE_PRAGMAS"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': '1; DROP TABLE x'})
+    def test_rejects_unsafe_values(self):
+        with self.assertRaises(ValueError):
+            list(sqlite_pragmas())
+
+
+class StaticPipelineTests(SimpleTestCase):
+    """collectstatic со сжатыми копиями и их раздача"""
+
+    CSS = 'css/bootstrap.min.css'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.static_settings = override_settings(STATIC_ROOT=cls.static_root)
+        cls.static_settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name(cls.CSS)
+        with open(os.path.join(settings.BASE_DIR, 'static', cls.CSS),
+                  'rb') as source:
+            cls.original = source.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.static_settings.disable()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name, **headers):
+        return Client().get(settings.STATIC_URL + name, **headers)
+
+    def test_collectstatic_writes_hashed_and_compressed(self):
+        self.assertNotEqual(self.hashed, self.CSS)
+        self.assertIn(self.hashed, staticfiles_storage.url(self.CSS))
+        self.assertTrue(staticfiles_storage.exists(self.hashed + '.gz'))
+        # Уже сжатые картинки не дублируются
+        self.assertFalse(staticfiles_storage.exists('img/logo.png.gz'))
+
+    def test_serves_gzip_with_far_future_cache(self):
+        """Хешированный файл отдаётся сжатым и кешируется надолго"""
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertLess(len(body), len(self.original))
+        self.assertEqual(gzip.decompress(body), self.original)
+
+    def test_serves_plain_without_accept_encoding(self):
+        response = self.get(self.hashed)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+
+    def test_unhashed_name_revalidates(self):
+        """Имя без хеша кешируется ненадолго и проверяется по дате"""
+        response = self.get(self.CSS)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.get(
+            self.CSS, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.5, br;q=0, Deflate'),
+            {'gzip', 'deflate'},
+        )
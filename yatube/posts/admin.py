@@ -1,8 +1,66 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models.expressions import RawSQL
+from django.forms.models import BaseModelFormSet
+from django.utils.functional import cached_property
 
+from . import counters, search
+from .common import LimitedCountPaginator
 from .models import Group, Post
 
 
+class PostPaginator(LimitedCountPaginator):
+    """Без фильтров количество постов берётся из счётчика ленты."""
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return counters.posts_count(counters.ALL, self.object_list)
+        return super().count
+
+
+class LabelledAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение с заранее известными подписями выбранных значений.
+
+    В list_editable виджет рисуется в каждой строке и без подписей
+    делал бы на каждую отдельный запрос за выбранной группой.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Общий для всех строк: копии виджета в формах его не копируют
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(choice) for choice in value
+            if str(choice) not in self.choices.field.empty_values
+        ]
+        if any(choice not in self.labels for choice in selected):
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required and not self.allow_multiple_selected:
+            options.append(self.create_option(name, '', '', False, 0))
+        for choice in selected:
+            options.append(self.create_option(
+                name, choice, self.labels[choice], True, len(options)
+            ))
+        return [(None, options, 0)]
+
+
+class PostChangeListFormSet(BaseModelFormSet):
+    """Передаёт виджету группы подписи групп текущей страницы."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.form.base_fields['group'].widget
+        widget = getattr(widget, 'widget', widget)
+        widget.labels.update(
+            (str(post.group_id), str(post.group))
+            for post in self.get_queryset() if post.group_id
+        )
+
+
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk',
@@ -12,10 +70,40 @@ class PostAdmin(admin.ModelAdmin):
                     'group'
                     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    # Фильтры по датам идут по индексу post_pub_date_id_idx
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('group',)
+    paginator = PostPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту через полнотекстовый индекс вместо LIKE."""
+        expression = search.match_expression(search_term)
+        if not expression or not search.is_supported():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        queryset = queryset.filter(
+            pk__in=RawSQL(search.MATCH_IDS_SQL, [expression])
+        )
+        return queryset, False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = LabelledAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', PostChangeListFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -23,8 +111,12 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'title',
         'description',
+        'posts_count',
     )
     list_editable = ('title',)
-    search_fields = ('title',)
-    list_filter = ('title',)
+    # По этим полям ищет и автодополнение группы в PostAdmin
+    search_fields = ('title', 'slug')
+    ordering = ('title',)
+    paginator = LimitedCountPaginator
+    show_full_result_count = False
     empty_value_display = 'пусто'
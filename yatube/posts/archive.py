@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from . import counters
+from .models import MonthBucket, Post
+
+
+def month_of(moment):
+    """Первое число месяца публикации в текущем часовом поясе."""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.date().replace(day=1)
+
+
+def period(year, month=None):
+    """Границы [начало, конец) года или месяца для фильтра по pub_date.
+
+    Для несуществующего года или месяца бросает ValueError.
+    """
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError(f'Нет месяца {month}')
+    start = date(year, month or 1, 1)
+    if month is None or month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return _moment(start), _moment(end)
+
+
+def _moment(day):
+    moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def post_buckets(author_id, group_id, pub_date, delta=1):
+    """Сдвиги месячных счётчиков всех областей поста."""
+    month = month_of(pub_date)
+    deltas = Counter()
+    for scope in counters.post_scopes(author_id, group_id):
+        deltas[scope, month] = delta
+    return deltas
+
+
+def change(deltas):
+    """Атомарно сдвигает месячные счётчики: {(область, месяц): сдвиг}.
+
+    Строки меняются в одном порядке, чтобы параллельные транзакции
+    не ждали друг друга по кругу. Счётчик не уходит ниже нуля:
+    расхождение исправит rebuild().
+    """
+    for (scope, month), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        buckets = MonthBucket.objects.filter(scope=scope, month=month)
+        if delta < 0:
+            buckets.filter(posts_count__gte=-delta).update(
+                posts_count=F('posts_count') + delta
+            )
+            continue
+        if buckets.update(posts_count=F('posts_count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                MonthBucket.objects.create(
+                    scope=scope, month=month, posts_count=delta
+                )
+        except IntegrityError:
+            buckets.update(posts_count=F('posts_count') + delta)
+
+
+def forget(scopes):
+    """Удаляет месяцы областей, которых больше нет."""
+    MonthBucket.objects.filter(scope__in=scopes).delete()
+
+
+def months(scope):
+    """[(месяц, постов)] области без пустых месяцев, новые первыми."""
+    return list(
+        MonthBucket.objects.filter(scope=scope, posts_count__gt=0)
+        .order_by('-month')
+        .values_list('month', 'posts_count')
+    )
+
+
+def posts_count(month_counts, year, month=None):
+    """Количество постов за год или месяц по строкам months()."""
+    return sum(
+        count for bucket, count in month_counts
+        if bucket.year == year and month in (None, bucket.month)
+    )
+
+
+def sidebar(month_counts, url_prefix, *args):
+    """Месяцы для колонки архива со ссылками на страницы архива.
+
+    url_prefix — начало имени адреса: к нему добавляются _year
+    и _month, args — аргументы адреса перед годом и месяцем.
+    """
+    return [
+        {
+            'month': month,
+            'posts_count': count,
+            'url': reverse(
+                f'posts:{url_prefix}_month',
+                args=[*args, month.year, month.month],
+            ),
+            'year_url': reverse(
+                f'posts:{url_prefix}_year', args=[*args, month.year]
+            ),
+        }
+        for month, count in month_counts
+    ]
+
+
+def actual():
+    """Месячные счётчики, посчитанные заново по таблице постов."""
+    deltas = Counter()
+    rows = Post.objects.order_by().values_list(
+        'author_id', 'group_id', 'pub_date'
+    )
+    for author_id, group_id, pub_date in rows.iterator():
+        deltas.update(post_buckets(author_id, group_id, pub_date))
+    return deltas
+
+
+def rebuild():
+    """Приводит таблицу месяцев к данным. Возвращает число исправлений."""
+    real = actual()
+    stored = {
+        (scope, month): count
+        for scope, month, count in MonthBucket.objects.values_list(
+            'scope', 'month', 'posts_count'
+        )
+    }
+    fixed = 0
+    with transaction.atomic():
+        for scope, month in set(real) | set(stored):
+            count = real.get((scope, month), 0)
+            if stored.get((scope, month), 0) == count:
+                continue
+            fixed += 1
+            if count:
+                MonthBucket.objects.update_or_create(
+                    scope=scope, month=month,
+                    defaults={'posts_count': count},
+                )
+            else:
+                MonthBucket.objects.filter(
+                    scope=scope, month=month
+                ).delete()
+    return fixed
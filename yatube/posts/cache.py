@@ -0,0 +1,133 @@
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core import instrumentation
+
+from . import counters, lookups
+from .models import Post
+
+
+def main_scope():
+    return [counters.ALL]
+
+
+def group_slug_scope(slug):
+    group = lookups.groups.find(slug)
+    return None if group is None else [counters.group_scope(group.pk)]
+
+
+def username_scope(username):
+    user = lookups.authors.find(username)
+    return None if user is None else [counters.author_scope(user.pk)]
+
+
+def archive_scope(resolve_scope):
+    """Области архива — те же, что у ленты; год и месяц не важны."""
+    def resolve(year, month=None, **kwargs):
+        return resolve_scope(**kwargs)
+    return resolve
+
+
+def post_scope(post_id):
+    """Страница поста зависит от его автора и группы, но не от ленты."""
+    ids = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if ids is None:
+        return None
+    return [scope for scope in counters.post_scopes(*ids)
+            if scope != counters.ALL]
+
+
+def scope_state(request, resolve_scope, kwargs):
+    """(области, версия, изменение) запроса; считается один раз.
+
+    Результат запоминается на request, чтобы условный GET и кеш
+    страниц не читали версию области повторно.
+    """
+    state = getattr(request, '_posts_scope_state', None)
+    if state is None:
+        scopes = resolve_scope(**kwargs)
+        version, updated = (
+            counters.scopes_state(scopes) if scopes else ('', None)
+        )
+        state = request._posts_scope_state = (scopes, version, updated)
+    return state
+
+
+def page_cache_key(view_name, scopes, version, request):
+    # Путь различает страницы одной области, например месяцы архива
+    query = md5(request.get_full_path().encode()).hexdigest()
+    return f'posts:page:{view_name}:{"|".join(scopes)}:{version}:{query}'
+
+
+def cache_listing(resolve_scope):
+    """Кеширует отрисованную страницу ленты для гостей.
+
+    Ключ содержит версию области (counters.touch), поэтому изменение
+    постов группы или автора делает недоступными только страницы этой
+    области: главной ленты, группы и профиля автора. Старые записи
+    просто истекают, удалять их по шаблону ключа не нужно.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            timeout = settings.POSTS_PAGE_CACHE_TIMEOUT
+            if (not timeout or request.method != 'GET'
+                    or request.user.is_authenticated):
+                return view(request, **kwargs)
+            scopes, version, _ = scope_state(request, resolve_scope, kwargs)
+            if scopes is None:
+                return view(request, **kwargs)
+
+            cache = caches[settings.POSTS_PAGE_CACHE]
+            key = page_cache_key(view.__name__, scopes, version, request)
+            cached = cache.get(key)
+            if cached is not None:
+                instrumentation.cache_hit('page_cache')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            instrumentation.cache_miss('page_cache')
+            response = view(request, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key, (response.content, response['Content-Type']), timeout
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(resolve_scope):
+    """Отвечает 304 на If-None-Match/If-Modified-Since до отрисовки.
+
+    ETag строится из версии областей страницы и пользователя: шапка
+    сайта у гостя и у авторизованного пользователя разная.
+    Last-Modified — время последнего изменения областей — отдаётся
+    только гостям: по нему страницу другого пользователя не отличить.
+    Vary: Cookie не даёт общим кешам смешивать страницы пользователей.
+    """
+    def etag(request, **kwargs):
+        scopes, version, _ = scope_state(request, resolve_scope, kwargs)
+        if scopes is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else ''
+        return md5(f'{version}:{user}'.encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return scope_state(request, resolve_scope, kwargs)[2]
+
+    def decorator(view):
+        return vary_on_cookie(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        )
+    return decorator
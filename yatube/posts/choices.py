@@ -0,0 +1,46 @@
+import threading
+
+from . import counters
+from .models import Group
+
+# (версия, варианты); кортеж заменяется целиком,
+# поэтому читатели без блокировки видят согласованное состояние
+_cache = (None, ())
+_lock = threading.Lock()
+
+
+def _load():
+    global _cache
+    version = counters.scope_version(counters.GROUPS)
+    if _cache[0] == version:
+        return _cache
+    with _lock:
+        if _cache[0] != version:
+            choices = tuple(
+                Group.objects.order_by('title').values_list('pk', 'title')
+            )
+            _cache = (version, choices)
+        return _cache
+
+
+def group_choices():
+    """Пары (id, название) всех групп из памяти процесса.
+
+    Список перечитывается, только когда сменилась версия области
+    counters.GROUPS: её обновляют сигналы сохранения и удаления
+    Group. Проверка версии — один запрос по уникальному столбцу
+    scope таблицы ScopeStats вместо выборки всех групп.
+    """
+    return _load()[1]
+
+
+def search_groups(query, limit=20):
+    """Группы, в названии которых есть query, без учёта регистра."""
+    query = query.casefold()
+    found = []
+    for group_id, title in group_choices():
+        if query in title.casefold():
+            found.append((group_id, title))
+            if len(found) == limit:
+                break
+    return found
@@ -1,10 +1,347 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
 
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
-def paginator(request, post_list, AMOUNT):
+CURSOR_PARAM = 'cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
 
-    paginator = Paginator(post_list, AMOUNT)
+
+def page_query(request):
+    """GET-параметры без номера страницы и курсора для ссылок паджинатора."""
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop(CURSOR_PARAM, None)
+    query = params.urlencode()
+    return f'{query}&' if query else ''
+
+
+def paginator(request, post_list, AMOUNT, count=None):
+    """Постраничный вывод: по номеру страницы или по курсору.
+
+    Известное заранее количество постов (count, число или функция)
+    избавляет от COUNT(*) при расчёте числа страниц. Курсор работает
+    только для QuerySet; другие последовательности листаются по номеру.
+    """
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor and isinstance(post_list, QuerySet):
+        return KeysetPaginator(post_list, AMOUNT).get_page(cursor)
+
+    if callable(count):
+        count = count()
+    paginator = CountedPaginator(post_list, AMOUNT, count=count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return page_obj
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому количество объектов можно передать готовым.
+
+    Вместо полного page_range шаблону отдаётся сокращённый список
+    номеров, размер которого не зависит от числа страниц. Для QuerySet
+    страницы дают курсоры соседних страниц, а ссылки на номера
+    ограничены первыми offset_pages: дальше листают по курсору, и
+    глубокая страница стоит столько же, сколько первая.
+    """
+
+    ELLIPSIS = '…'
+    offset_pages = 5
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        self.keyset = None
+        if isinstance(object_list, QuerySet):
+            self.keyset = KeysetPaginator(object_list, per_page)
+            # Тот же порядок, что у курсоров: иначе посты с одной
+            # датой на стыке страниц могли бы пропасть или повториться
+            object_list = object_list.order_by(*self.keyset.ordering)
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Первые и последние страницы, соседи текущей и многоточия."""
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from range(1, num_pages + 1)
+            return
+
+        if number > on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+
+        if number < num_pages - on_each_side - on_ends:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+
+class LimitedCountPaginator(Paginator):
+    """Paginator, который считает строки не дальше limit.
+
+    COUNT(*) по подзапросу с LIMIT читает не больше limit + 1 строк,
+    поэтому его цена не растёт с таблицей. Если строк больше, count
+    равен limit: дальние страницы доступны только через фильтры.
+    """
+
+    limit = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        return min(queryset.order_by()[:self.limit + 1].count(), self.limit)
+
+
+class ElidedPage(Page):
+    """Страница со сжатым списком номеров и курсорами соседей."""
+
+    @property
+    def elided_page_range(self):
+        pages = list(self.paginator.get_elided_page_range(self.number))
+        if self.paginator.keyset is None:
+            return pages
+        limit = self.paginator.offset_pages
+        shown = [page for page in pages
+                 if page == self.paginator.ELLIPSIS or page <= limit
+                 or page == self.number]
+        while shown and shown[-1] == self.paginator.ELLIPSIS:
+            shown.pop()
+        if self.paginator.num_pages > shown[-1]:
+            shown.append(self.paginator.ELLIPSIS)
+        return shown
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(direction, self.paginator.keyset._key(obj))
+
+    @property
+    def next_cursor(self):
+        if self.paginator.keyset is None or not self.has_next():
+            return None
+        return self._cursor(NEXT, self[len(self) - 1])
+
+    @property
+    def previous_cursor(self):
+        if self.paginator.keyset is None or not self.has_previous():
+            return None
+        return self._cursor(PREVIOUS, self[0])
+
+    @property
+    def last_cursor(self):
+        if self.paginator.keyset is None or not self.has_next():
+            return None
+        return encode_cursor(PREVIOUS, None)
+
+
+def encode_cursor(direction, key):
+    """Упаковывает направление и ключ строки в непрозрачный курсор."""
+    raw = json.dumps([direction, key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, ключ) или None для битого курсора."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return direction, key
+
+
+class KeysetPaginator(Paginator):
+    """Паджинатор по ключу сортировки вместо OFFSET.
+
+    Порядок берётся из Meta.ordering модели и дополняется первичным
+    ключом, поэтому ключ строки уникален. Стоимость страницы не
+    зависит от её глубины и не требует COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        super().__init__(object_list, per_page)
+        model = object_list.model
+        fields = list(ordering or object_list.query.order_by
+                      or model._meta.ordering)
+        names = [field.lstrip('-') for field in fields]
+        if 'pk' not in names and model._meta.pk.name not in names:
+            descending = fields[0].startswith('-') if fields else False
+            fields.append('-pk' if descending else 'pk')
+        self.ordering = fields
+
+    @property
+    def _fields(self):
+        return [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in self.ordering
+        ]
+
+    def _key(self, obj):
+        key = []
+        for name, _ in self._fields:
+            value = getattr(obj, name)
+            key.append(value.isoformat() if hasattr(value, 'isoformat')
+                       else value)
+        return key
+
+    def _parse_key(self, key):
+        fields = self._fields
+        if not isinstance(key, list) or len(key) != len(fields):
+            return None
+        values = []
+        model = self.object_list.model
+        for (name, _), value in zip(fields, key):
+            field = model._meta.pk if name == 'pk' else (
+                model._meta.get_field(name)
+            )
+            value = self._parse_value(field, value)
+            if value is None:
+                return None
+            values.append(value)
+        return values
+
+    def _parse_value(self, field, value):
+        """Значение ключа из курсора или None, если оно не подходит полю.
+
+        Курсор приходит от клиента, поэтому проверяется каждый
+        элемент: битый курсор даёт первую страницу, а не ошибку.
+        """
+        internal_type = field.get_internal_type()
+        if internal_type == 'DateTimeField':
+            if not isinstance(value, str):
+                return None
+            try:
+                return parse_datetime(value)
+            except ValueError:
+                return None
+        if internal_type in ('AutoField', 'BigAutoField', 'IntegerField'):
+            if isinstance(value, bool) or not isinstance(value, int):
+                return None
+            return value
+        if value is None:
+            return None
+        try:
+            return field.to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def _seek(self, values, forward):
+        """Условие «строго после ключа» в направлении обхода."""
+        fields = self._fields
+        condition = Q()
+        for index, (name, descending) in enumerate(fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for (prev_name, _), prev_value in zip(fields, values[:index]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def get_page(self, cursor=None):
+        """Страница после (или перед) ключом из курсора.
+
+        Курсор назад без ключа означает последнюю страницу.
+        """
+        direction, values = NEXT, None
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is not None:
+            key = decoded[1]
+            values = self._parse_key(key) if key is not None else None
+            if key is None or values is not None:
+                direction = decoded[0]
+        forward = direction == NEXT
+
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ])
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = values is not None, has_more
+        return KeysetPage(rows, self, has_next, has_previous)
+
+
+class KeysetPage(Page):
+    """Страница курсорного паджинатора без номеров страниц.
+
+    Номер и смещение курсорной странице неизвестны: методы Page,
+    которые их возвращают, отдают None.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        key = self.paginator._key(self.object_list[-1])
+        return encode_cursor(NEXT, key)
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        key = self.paginator._key(self.object_list[0])
+        return encode_cursor(PREVIOUS, key)
+
+    @property
+    def last_cursor(self):
+        return encode_cursor(PREVIOUS, None)
+
+    def next_page_number(self):
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
@@ -0,0 +1,230 @@
+from uuid import uuid4
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AuthorStats, Group, Post, ScopeStats
+
+ALL = 'all'
+# Версия списка групп для кеша вариантов в PostForm
+GROUPS = 'groups'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def post_scopes(author_id, group_id):
+    """Области ленты, в которых виден пост."""
+    scopes = [ALL, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def group_page_scopes(group_id):
+    """Области, на страницах которых видны название и slug группы.
+
+    Кроме самой группы это вся лента и профили авторов её постов.
+    """
+    authors = Post.objects.filter(group_id=group_id).order_by().values_list(
+        'author_id', flat=True
+    ).distinct()
+    return [ALL, group_scope(group_id)] + [
+        author_scope(author_id) for author_id in authors
+    ]
+
+
+def author_page_scopes(author_id):
+    """Области, на страницах которых видны имя и username автора."""
+    groups = Post.objects.filter(
+        author_id=author_id, group__isnull=False
+    ).order_by().values_list('group_id', flat=True).distinct()
+    return [ALL, author_scope(author_id)] + [
+        group_scope(group_id) for group_id in groups
+    ]
+
+
+def posts_count(scope, queryset):
+    """Количество постов области без COUNT(*) на каждый запрос.
+
+    Если счётчика ещё нет, он один раз считается по queryset
+    и дальше поддерживается сигналами модели Post.
+    """
+    try:
+        count = ScopeStats.objects.values_list(
+            'posts_count', flat=True
+        ).get(scope=scope)
+    except ScopeStats.DoesNotExist:
+        count = queryset.count()
+        try:
+            with transaction.atomic():
+                ScopeStats.objects.create(scope=scope, posts_count=count)
+        except IntegrityError:
+            pass
+        return count
+
+    if count is None:
+        count = queryset.count()
+        ScopeStats.objects.filter(
+            scope=scope, posts_count__isnull=True
+        ).update(posts_count=count)
+    return count
+
+
+def author_count(user):
+    """Количество постов автора из AuthorStats."""
+    try:
+        return user.post_stats.posts_count
+    except AuthorStats.DoesNotExist:
+        stats, _ = AuthorStats.objects.get_or_create(
+            user=user, defaults={'posts_count': user.posts.count()}
+        )
+        return stats.posts_count
+
+
+def change_counts(author_id, group_id, delta, total=True):
+    """Атомарно сдвигает счётчики ленты, автора и группы на delta.
+
+    total=False оставляет общий счётчик ленты как есть: так
+    учитывается перенос поста между группами или авторами.
+    """
+    if not delta:
+        return
+    if total:
+        shift(ScopeStats.objects.filter(
+            scope=ALL, posts_count__isnull=False
+        ), 'posts_count', delta)
+    if author_id is not None:
+        shift(
+            AuthorStats.objects.filter(user_id=author_id),
+            'posts_count', delta,
+        )
+    if group_id is not None:
+        shift(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def shift(queryset, field, delta):
+    """Сдвигает неотрицательный счётчик field на delta.
+
+    Разошедшийся счётчик не уходит ниже нуля: иначе удаление поста
+    упало бы на CHECK поля. Такие расхождения исправляет
+    check_post_counters --fix.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def scope_state(scope):
+    """Версия области и время её изменения; ('', None) без изменений."""
+    state = ScopeStats.objects.filter(scope=scope).values_list(
+        'version', 'updated'
+    ).first()
+    return state or ('', None)
+
+
+def scopes_state(scopes):
+    """Общая версия нескольких областей и последнее их изменение."""
+    rows = {
+        scope: (version, updated)
+        for scope, version, updated in ScopeStats.objects.filter(
+            scope__in=scopes
+        ).values_list('scope', 'version', 'updated')
+    }
+    states = [rows.get(scope, ('', None)) for scope in scopes]
+    version = ':'.join(version for version, _ in states)
+    updates = [updated for _, updated in states if updated is not None]
+    return version, max(updates, default=None)
+
+
+def scope_version(scope):
+    """Версия области; пустая строка, если область ещё не менялась."""
+    return scope_state(scope)[0]
+
+
+def touch(scopes):
+    """Выдаёт областям новую версию после изменения их постов.
+
+    Версия случайная, а не счётчик: после отката транзакции
+    старое значение не совпадёт с версией другого содержимого.
+    """
+    if not scopes:
+        return
+    values = {'version': uuid4().hex, 'updated': timezone.now()}
+    existing = set(ScopeStats.objects.filter(
+        scope__in=scopes
+    ).values_list('scope', flat=True))
+    ScopeStats.objects.filter(scope__in=existing).update(**values)
+    ScopeStats.objects.bulk_create(
+        [
+            ScopeStats(scope=scope, posts_count=None, **values)
+            for scope in set(scopes) - existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def forget(scopes):
+    """Удаляет версии областей, которых больше нет."""
+    ScopeStats.objects.filter(scope__in=scopes).delete()
+
+
+def drift():
+    """Расхождения счётчиков с данными: (область, хранится, на деле)."""
+    problems = []
+    total = Post.objects.count()
+    stored = ScopeStats.objects.filter(scope=ALL).values_list(
+        'posts_count', flat=True
+    ).first()
+    if stored is not None and stored != total:
+        problems.append((ALL, stored, total))
+
+    groups = Group.objects.annotate(actual=Count('posts')).order_by('pk')
+    for group in groups:
+        if group.posts_count != group.actual:
+            problems.append(
+                (group_scope(group.pk), group.posts_count, group.actual)
+            )
+
+    actual = dict(
+        Post.objects.order_by().values_list('author').annotate(Count('pk'))
+    )
+    stats = dict(AuthorStats.objects.values_list('user', 'posts_count'))
+    for author_id in sorted(set(actual) | set(stats)):
+        if stats.get(author_id) != actual.get(author_id, 0):
+            problems.append((
+                author_scope(author_id),
+                stats.get(author_id),
+                actual.get(author_id, 0),
+            ))
+    return problems
+
+
+def fix(problems):
+    """Записывает в счётчики реальные значения из drift()."""
+    with transaction.atomic():
+        for scope, _, actual in problems:
+            kind, _, pk = scope.partition(':')
+            if kind == ALL:
+                ScopeStats.objects.filter(scope=ALL).update(
+                    posts_count=actual
+                )
+            elif scope == group_scope(pk):
+                Group.objects.filter(pk=pk).update(posts_count=actual)
+            else:
+                AuthorStats.objects.update_or_create(
+                    user_id=pk, defaults={'posts_count': actual}
+                )
+
+
+def rebuild():
+    """Пересчитывает все счётчики. Возвращает число исправлений."""
+    problems = drift()
+    fix(problems)
+    return len(problems)
@@ -0,0 +1,210 @@
+import json
+from datetime import datetime, time
+from hashlib import md5
+from xml.sax.saxutils import escape
+
+from django.http import (Http404, HttpResponseBadRequest,
+                         HttpResponseNotModified, StreamingHttpResponse)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.http import parse_etags, quote_etag
+
+from . import counters, lookups
+from .models import Post
+
+FEED_LIMIT = 50
+CHUNK_SIZE = 500
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+class FeedMeta:
+    """Заголовок ленты и абсолютные адреса для её записей."""
+
+    def __init__(self, request, title, link, updated):
+        self.request = request
+        self.title = title
+        self.link = request.build_absolute_uri(link)
+        self.url = request.build_absolute_uri()
+        self.updated = updated or timezone.now()
+
+    def post_url(self, post):
+        return self.request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+
+
+def author_name(post):
+    return post.author.get_full_name() or post.author.username
+
+
+def rss(meta, posts):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel>'
+        f'<title>{escape(meta.title)}</title>'
+        f'<link>{escape(meta.link)}</link>'
+        f'<description>{escape(meta.title)}</description>'
+        f'<lastBuildDate>{rfc2822_date(meta.updated)}</lastBuildDate>'
+    )
+    for post in posts:
+        url = escape(meta.post_url(post))
+        yield (
+            f'<item><title>{escape(str(post))}</title>'
+            f'<link>{url}</link><guid>{url}</guid>'
+            f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate>'
+            f'<description>{escape(post.text)}</description></item>'
+        )
+    yield '</channel></rss>\n'
+
+
+def atom(meta, posts):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{escape(meta.title)}</title>'
+        f'<id>{escape(meta.link)}</id>'
+        f'<link href="{escape(meta.link)}"/>'
+        f'<updated>{rfc3339_date(meta.updated)}</updated>'
+    )
+    for post in posts:
+        url = escape(meta.post_url(post))
+        yield (
+            f'<entry><title>{escape(str(post))}</title>'
+            f'<id>{url}</id><link href="{url}"/>'
+            f'<updated>{rfc3339_date(post.pub_date)}</updated>'
+            f'<author><name>{escape(author_name(post))}</name></author>'
+            f'<content type="text">{escape(post.text)}</content></entry>'
+        )
+    yield '</feed>\n'
+
+
+def json_feed(meta, posts):
+    header = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': meta.title,
+        'home_page_url': meta.link,
+        'feed_url': meta.url,
+    }, ensure_ascii=False)
+    # Открываем объект заголовка и дописываем массив записей по одной
+    yield header[:-1] + ', "items": ['
+    separator = ''
+    for post in posts:
+        url = meta.post_url(post)
+        item = json.dumps({
+            'id': url,
+            'url': url,
+            'title': str(post),
+            'content_text': post.text,
+            'date_published': rfc3339_date(post.pub_date),
+            'authors': [{'name': author_name(post)}],
+        }, ensure_ascii=False)
+        yield separator + item
+        separator = ', '
+    yield ']}\n'
+
+
+WRITERS = {'rss': rss, 'atom': atom, 'json': json_feed}
+
+
+def parse_since(value):
+    """Дата и время ISO 8601 или только дата — начало дня.
+
+    Время без часового пояса считается UTC, дата — днём в текущем
+    часовом поясе. Для нераспознанного значения возвращает None.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            return timezone.make_aware(datetime.combine(day, time.min))
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def feed_response(request, scope, title, link, post_list):
+    """Потоковая лента области с ETag и выборкой новее since.
+
+    ETag строится из версии области (counters.touch) и параметров
+    запроса, поэтому неизменившаяся лента отдаётся как 304 без
+    обращения к постам. full=1 отдаёт всю историю частями через
+    iterator(), не собирая документ в памяти.
+    """
+    fmt = request.GET.get('format', 'rss')
+    if fmt not in WRITERS:
+        raise Http404('Неизвестный формат ленты')
+    since = None
+    if request.GET.get('since'):
+        since = parse_since(request.GET['since'])
+        if since is None:
+            return HttpResponseBadRequest('since: ожидается дата ISO 8601')
+    full = request.GET.get('full') == '1'
+
+    version, updated = counters.scope_state(scope)
+    etag = quote_etag(md5(
+        f'{version}:{fmt}:{since}:{full}'.encode()
+    ).hexdigest())
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    # Сжатый ответ уходит со слабым W/-ETag, сравнение тоже слабое
+    if if_none_match and (
+        etag in {tag[2:] if tag.startswith('W/') else tag
+                 for tag in parse_etags(if_none_match)}
+        or if_none_match.strip() == '*'
+    ):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if since is not None:
+        post_list = post_list.filter(pub_date__gt=since)
+    if not full:
+        post_list = post_list[:FEED_LIMIT]
+    meta = FeedMeta(request, title, link, updated)
+    response = StreamingHttpResponse(
+        WRITERS[fmt](meta, post_list.iterator(chunk_size=CHUNK_SIZE)),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response['ETag'] = etag
+    return response
+
+
+def index_feed(request):
+    return feed_response(
+        request,
+        counters.ALL,
+        'Yatube: последние записи',
+        reverse('posts:main_page'),
+        Post.objects.select_related('author'),
+    )
+
+
+def group_feed(request, slug):
+    group = lookups.groups.get(slug)
+    return feed_response(
+        request,
+        counters.group_scope(group.pk),
+        f'Yatube: {group.title}',
+        reverse('posts:posts_by_groups', args=[slug]),
+        group.posts.select_related('author'),
+    )
+
+
+def profile_feed(request, username):
+    author = lookups.authors.get(username)
+    return feed_response(
+        request,
+        counters.author_scope(author.pk),
+        f'Yatube: {author.get_full_name() or username}',
+        reverse('posts:profile', args=[username]),
+        author.posts.all(),
+    )
@@ -1,17 +1,54 @@
 from django import forms
+from django.conf import settings
 
-from .models import Post
+from . import choices
+from .models import Group, Post
 
 
 class PostForm(forms.ModelForm):
 
     class Meta:
         model = Post
-        fields = ('text', 'group',)
+        fields = ('text', 'group', 'image',)
         help_text = {
             'text': 'Текст поста',
             'group': 'Группа',
+            'image': 'Картинка',
         }
+        widgets = {
+            'group': forms.Select(attrs={'class': 'form-control'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Варианты группы не выбираются из базы при каждой отрисовке:
+        # берутся из кеша процесса, а с GROUP_SEARCH в форму попадает
+        # только выбранная группа, остальные ищутся через group_search
+        self.group_search = settings.GROUP_SEARCH
+        self._group_choices = None
+        self.fields['group'].choices = self.group_choices
+
+    def group_choices(self):
+        """Варианты поля group; виджет перебирает их дважды."""
+        if self._group_choices is None:
+            empty = [('', self.fields['group'].empty_label)]
+            if self.group_search:
+                self._group_choices = empty + self.selected_group()
+            else:
+                self._group_choices = empty + list(choices.group_choices())
+        return self._group_choices
+
+    def selected_group(self):
+        try:
+            group_id = int(self['group'].value())
+        except (TypeError, ValueError):
+            return []
+        # Одна строка по первичному ключу: список всех групп
+        # в режиме поиска не нужен даже из кеша
+        title = Group.objects.filter(pk=group_id).values_list(
+            'title', flat=True
+        ).first()
+        return [] if title is None else [(group_id, title)]
 
     def clean_text(self):
         data = self.cleaned_data['text']
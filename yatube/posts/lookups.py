@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core import instrumentation
+from core.ttlcache import MISSING, TTLCache
+
+from .models import Group
+
+User = get_user_model()
+
+# Несуществующий адрес: 404 тоже не должен каждый раз идти в базу
+NOT_FOUND = None
+
+
+class Lookup:
+    """Поиск строки модели по уникальному полю с кешем процесса.
+
+    Хранятся значения полей, а не объект: каждый вызов получает свой
+    экземпляр. Поля из volatile меняются без сигналов (счётчики через
+    F()), поэтому не кешируются и при обращении дочитываются из базы
+    как отложенные. Записи сбрасываются сигналами модели; изменения
+    из других процессов видны не позже чем через TTL.
+    """
+
+    def __init__(self, name, model, field, volatile=()):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.fields = [
+            field.attname for field in model._meta.concrete_fields
+            if field.name not in volatile
+        ]
+        self.cache = TTLCache(settings.LOOKUP_CACHE_SIZE)
+
+    def find(self, value):
+        """Объект с field=value или None."""
+        entry = self.cache.get(value, MISSING)
+        if entry is MISSING:
+            instrumentation.cache_miss(self.name)
+            queryset = self.model.objects.filter(**{self.field: value})
+            row = queryset.values_list(*self.fields).first()
+            entry = NOT_FOUND if row is None else (queryset.db, row)
+            self.cache.set(value, entry, (
+                settings.LOOKUP_CACHE_TIMEOUT if entry is not NOT_FOUND
+                else settings.LOOKUP_CACHE_NEGATIVE_TIMEOUT
+            ))
+        else:
+            instrumentation.cache_hit(self.name)
+        if entry is NOT_FOUND:
+            return None
+        db, row = entry
+        return self.model.from_db(db, self.fields, row)
+
+    def get(self, value):
+        """Как get_object_or_404: объект или Http404."""
+        instance = self.find(value)
+        if instance is None:
+            raise Http404(
+                f'No {self.model._meta.object_name} matches the given query.'
+            )
+        return instance
+
+    def forget(self, instance):
+        """Сбрасывает записи объекта, в том числе под старым значением."""
+        self.cache.discard(getattr(instance, self.field))
+        index = self.fields.index(self.model._meta.pk.attname)
+        self.cache.discard_where(
+            lambda entry: (entry is not NOT_FOUND
+                           and entry[1][index] == instance.pk)
+        )
+
+
+groups = Lookup('group_lookup', Group, 'slug', volatile={'posts_count'})
+authors = Lookup('author_lookup', User, 'username')
@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+SYLLABLES = ('ка', 'ло', 'ми', 'ра', 'то', 'ны', 'се', 'ду', 'по', 'жи')
+SCHEMA_SQL = (
+    f'CREATE TABLE {search.POSTS_TABLE} ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, '
+    'pub_date DATETIME NOT NULL, author_id INTEGER NOT NULL, '
+    'group_id INTEGER NULL)'
+)
+PUB_DATE_INDEX_SQL = (
+    f'CREATE INDEX post_pub_date_id_idx ON {search.POSTS_TABLE} (pub_date, id)'
+)
+# Так Django строит text__icontains для SQLite и страницу списка админки
+LIKE_PAGE_SQL = (
+    f"SELECT id FROM {search.POSTS_TABLE} WHERE text LIKE ? ESCAPE '\\' "
+    'ORDER BY pub_date DESC LIMIT ?'
+)
+LIKE_COUNT_SQL = (
+    f"SELECT COUNT(*) FROM {search.POSTS_TABLE} WHERE text LIKE ? ESCAPE '\\'"
+)
+FTS_COUNT_SQL = (
+    f'SELECT COUNT(*) FROM {search.FTS_TABLE} '
+    f'WHERE {search.FTS_TABLE} MATCH ?'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск по FTS5 с text__icontains на синтетическом '
+        'корпусе во временной базе SQLite'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch', type=int, default=50_000)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--db', help='Файл базы; по умолчанию временный и удаляется'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            for _ in range(20_000)
+        ]
+        path = options['db']
+        if path is None:
+            handle, path = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(handle)
+            os.unlink(path)
+        try:
+            db = sqlite3.connect(path)
+            self.seed(db, rng, vocabulary, options)
+            words = rng.sample(vocabulary, options['queries'])
+            self.compare(db, words, options['page_size'])
+            db.close()
+        finally:
+            if options['db'] is None and os.path.exists(path):
+                os.unlink(path)
+
+    def seed(self, db, rng, vocabulary, options):
+        started = time.perf_counter()
+        db.execute(SCHEMA_SQL)
+        db.execute(PUB_DATE_INDEX_SQL)
+        total, batch = options['posts'], options['batch']
+        for start in range(0, total, batch):
+            rows = [
+                (
+                    ' '.join(rng.choices(vocabulary, k=rng.randint(5, 40))),
+                    f'2020-01-01 00:00:{number:012d}',
+                    rng.randint(1, 1000),
+                )
+                for number in range(start, min(start + batch, total))
+            ]
+            db.executemany(
+                f'INSERT INTO {search.POSTS_TABLE} (text, pub_date, '
+                'author_id) VALUES (?, ?, ?)',
+                rows,
+            )
+        for statement in search.INSTALL_SQL:
+            db.execute(statement)
+        db.execute(search.REBUILD_SQL)
+        db.commit()
+        self.stdout.write(
+            f'Корпус: {total} постов за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
+
+    def timed(self, db, sql, params):
+        started = time.perf_counter()
+        db.execute(sql, params).fetchall()
+        return (time.perf_counter() - started) * 1000
+
+    def compare(self, db, words, page_size):
+        fts_page_sql = search.SEARCH_SQL.format(
+            filters='', order='ASC'
+        ).replace('%s', '?')
+        paths = {
+            'icontains: страница': lambda word: self.timed(
+                db, LIKE_PAGE_SQL, (f'%{word}%', page_size)
+            ),
+            'icontains: COUNT': lambda word: self.timed(
+                db, LIKE_COUNT_SQL, (f'%{word}%',)
+            ),
+            'fts5: страница': lambda word: self.timed(
+                db, fts_page_sql, (search.match_expression(word), page_size)
+            ),
+            'fts5: COUNT': lambda word: self.timed(
+                db, FTS_COUNT_SQL, (search.match_expression(word),)
+            ),
+        }
+        for name, measure in paths.items():
+            timings = sorted(measure(word) for word in words)
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f'{name:<22} медиана {statistics.median(timings):8.2f} мс'
+                f'   p95 {p95:8.2f} мс'
+            )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики постов с данными и при --fix исправляет их'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Записать реальные значения в разошедшиеся счётчики',
+        )
+
+    def handle(self, *args, **options):
+        problems = counters.drift()
+        for scope, stored, actual in problems:
+            self.stdout.write(f'{scope}: хранится {stored}, на деле {actual}')
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        if options['fix']:
+            counters.fix(problems)
+            self.stdout.write(
+                self.style.SUCCESS(f'Исправлено счётчиков: {len(problems)}')
+            )
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Расхождений: {len(problems)}, запустите с --fix'
+            ))
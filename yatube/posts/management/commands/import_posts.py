@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+User = get_user_model()
+
+
+class LookupCache:
+    """Ограниченный кеш «ключ → id» с пакетной догрузкой из базы."""
+
+    def __init__(self, queryset, field, size):
+        self.queryset = queryset
+        self.field = field
+        self.size = size
+        self.ids = OrderedDict()
+
+    def load(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for key in missing:
+                # Неизвестные ключи тоже запоминаем, чтобы не искать снова
+                self.ids[key] = found.get(key)
+        for key in keys:
+            if key in self.ids:
+                self.ids.move_to_end(key)
+        while len(self.ids) > self.size:
+            self.ids.popitem(last=False)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+def insert_with_dates(posts):
+    """Как bulk_create, но pub_date постов сохраняется как есть.
+
+    Вставка идёт с raw=True, как у loaddata: pre_save полей не
+    вызывается, и auto_now_add не перезаписывает исходные даты.
+    Само поле модели не меняется, поэтому посты, которые в это
+    время сохраняют другие потоки, получают дату как обычно.
+    """
+    if not posts:
+        return
+    fields = [
+        field for field in Post._meta.concrete_fields
+        if not field.primary_key
+    ]
+    queryset = Post.objects.all()
+    batch_size = max(
+        connections[queryset.db].ops.bulk_batch_size(fields, posts), 1
+    )
+    for start in range(0, len(posts), batch_size):
+        queryset._insert(
+            posts[start:start + batch_size], fields=fields,
+            raw=True, using=queryset.db,
+        )
+    for post in posts:
+        post._state.adding = False
+        post._state.db = queryset.db
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает посты из JSONL или CSV (файл или stdin). '
+        'Поля: text, author (username), group (slug), pub_date (ISO 8601)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу или - для stdin')
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'),
+            help='По умолчанию по расширению файла, для stdin — jsonl',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--cache-size', type=int, default=100_000,
+            help='Сколько авторов и групп держать в памяти',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с числом обработанных строк для продолжения загрузки',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        source = options['source']
+        fmt = options['format'] or (
+            'csv' if source.lower().endswith('.csv') else 'jsonl'
+        )
+        checkpoint = options['checkpoint']
+        done = self.read_checkpoint(checkpoint)
+
+        self.authors = LookupCache(
+            User.objects.all(), 'username', options['cache_size']
+        )
+        self.groups = LookupCache(
+            Group.objects.all(), 'slug', options['cache_size']
+        )
+        self.created = self.skipped = 0
+        started = time.perf_counter()
+
+        with self.open_source(source) as stream:
+            rows = islice(self.parse(stream, fmt), done, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                done += len(batch)
+                self.write_checkpoint(checkpoint, done)
+                self.report(done, started)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: создано {self.created}, пропущено {self.skipped}, '
+            f'{self.rate(self.created, started):.0f} строк/с'
+        ))
+
+    @contextmanager
+    def open_source(self, source):
+        if source == '-':
+            yield io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+            return
+        try:
+            stream = open(source, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {source}: {error}')
+        with stream:
+            yield stream
+
+    def parse(self, stream, fmt):
+        """Строки источника как словари; битые строки — None."""
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else None
+
+    def import_batch(self, batch):
+        rows = [row for row in batch if row and row.get('text')]
+        self.skipped += len(batch) - len(rows)
+        self.authors.load([row.get('author') for row in rows])
+        self.groups.load([row.get('group') for row in rows])
+
+        now = timezone.now()
+        posts = []
+        for row in rows:
+            author_id = self.authors.get(row.get('author'))
+            group_id = self.groups.get(row.get('group'))
+            if author_id is None or (row.get('group') and group_id is None):
+                self.skipped += 1
+                continue
+            pub_date = parse_datetime(row.get('pub_date') or '') or now
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date, timezone.utc)
+            posts.append(Post(
+                text=row['text'],
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=pub_date,
+            ))
+
+        with transaction.atomic():
+            insert_with_dates(posts)
+            posts_bulk_created.send(sender=Post, posts=posts)
+        self.created += len(posts)
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as checkpoint:
+            try:
+                return int(checkpoint.read().strip() or 0)
+            except ValueError:
+                raise CommandError(f'Повреждён файл контрольной точки {path}')
+
+    def write_checkpoint(self, path, done):
+        if not path:
+            return
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(str(done))
+        os.replace(temporary, path)
+
+    def rate(self, rows, started):
+        return rows / max(time.perf_counter() - started, 1e-9)
+
+    def report(self, done, started):
+        self.stdout.write(
+            f'Обработано строк: {done}, создано {self.created}, '
+            f'{self.rate(self.created, started):.0f} строк/с'
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive, counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов ленты, групп и авторов '
+        'и месяцы архива с нуля'
+    )
+
+    def handle(self, *args, **options):
+        fixed = counters.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {fixed}')
+        )
+        fixed = archive.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено месяцев архива: {fixed}')
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scopestats',
+            name='updated',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последнее изменение'),
+        ),
+        migrations.AddField(
+            model_name='scopestats',
+            name='version',
+            field=models.CharField(blank=True, help_text='Меняется при каждом изменении постов области', max_length=32, verbose_name='Версия'),
+        ),
+        migrations.AlterField(
+            model_name='scopestats',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, help_text='Пусто, пока счётчик не посчитан', null=True, verbose_name='Количество постов'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:38
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_month_buckets(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    MonthBucket = apps.get_model('posts', 'MonthBucket')
+    counts = Counter()
+    rows = Post.objects.order_by().values_list(
+        'author_id', 'group_id', 'pub_date'
+    )
+    for author_id, group_id, pub_date in rows.iterator():
+        if timezone.is_aware(pub_date):
+            pub_date = timezone.localtime(pub_date)
+        month = pub_date.date().replace(day=1)
+        counts['all', month] += 1
+        counts[f'author:{author_id}', month] += 1
+        if group_id is not None:
+            counts[f'group:{group_id}', month] += 1
+    MonthBucket.objects.bulk_create(
+        MonthBucket(scope=scope, month=month, posts_count=count)
+        for (scope, month), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64, verbose_name='Область')),
+                ('month', models.DateField(help_text='Первое число месяца', verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthbucket',
+            constraint=models.UniqueConstraint(fields=('scope', 'month'), name='unique_month_bucket'),
+        ),
+        migrations.RunPython(fill_month_buckets, migrations.RunPython.noop),
+    ]
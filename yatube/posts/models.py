@@ -9,6 +9,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество постов',
+    )
 
     def __str__(self):
         return self.title
@@ -42,6 +47,181 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост',
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'], name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Денормализованная статистика автора."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков',
+    )
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class ScopeStats(models.Model):
+    """Версии областей ленты и общий счётчик постов.
+
+    Количество постов хранится только для всей ленты: для групп
+    и авторов оно лежит в Group.posts_count и AuthorStats.
+    """
+
+    scope = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Область',
+    )
+    posts_count = models.PositiveIntegerField(
+        null=True,
+        default=0,
+        verbose_name='Количество постов',
+        help_text='Пусто, пока счётчик не посчитан',
+    )
+    version = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Версия',
+        help_text='Меняется при каждом изменении постов области',
+    )
+    updated = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последнее изменение',
+    )
+
+    def __str__(self):
+        return f'{self.scope}: {self.posts_count}'
+
+
+class MonthBucket(models.Model):
+    """Количество постов области за месяц для архива по датам.
+
+    Области те же, что у ScopeStats: вся лента, группа, автор.
+    Строки поддерживаются сигналами модели Post, поэтому архиву
+    не нужен GROUP BY по всей таблице постов.
+    """
+
+    scope = models.CharField(
+        max_length=64,
+        verbose_name='Область',
+    )
+    month = models.DateField(
+        verbose_name='Месяц',
+        help_text='Первое число месяца',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'month'], name='unique_month_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.month:%Y-%m}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, записанный при публикации.
+
+    Автор и дата поста продублированы, чтобы лента читалась
+    по индексу без соединения с таблицей постов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
@@ -0,0 +1,167 @@
+import re
+
+from django.db import connection
+
+from .common import NEXT, KeysetPage, decode_cursor
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+POSTS_TABLE = Post._meta.db_table
+
+# Внешний контент: индекс хранит только токены, текст лежит в posts_post.
+# IF NOT EXISTS позволяет пересоздавать триггеры после миграций, которые
+# пересобирают таблицу постов и теряют её триггеры.
+INSTALL_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='{POSTS_TABLE}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON {POSTS_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON {POSTS_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF text ON {POSTS_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+SEARCH_SQL = (
+    f'SELECT post.id, bm25({FTS_TABLE}) AS score '
+    f'FROM {FTS_TABLE} JOIN {POSTS_TABLE} post '
+    f'ON post.id = {FTS_TABLE}.rowid '
+    f'WHERE {FTS_TABLE} MATCH %s{{filters}} '
+    f'ORDER BY score {{order}}, post.id {{order}} LIMIT %s'
+)
+MATCH_IDS_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+TOKEN = re.compile(r'\w+\*?')
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(using=connection, rebuild=False):
+    """Создаёт индекс и триггеры синхронизации, если их ещё нет."""
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(REBUILD_SQL)
+
+
+def uninstall(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def match_expression(query):
+    """Переводит пользовательский запрос в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 в тексте
+    не работают; слово со звёздочкой на конце ищется по префиксу.
+    """
+    terms = []
+    for token in TOKEN.findall(query or ''):
+        word = token.rstrip('*')
+        terms.append(f'"{word}"*' if token.endswith('*') else f'"{word}"')
+    return ' '.join(terms)
+
+
+def search_ids(expression, limit, group_id=None, author_id=None,
+               after=None, forward=True):
+    """Пары (id, score) в порядке релевантности после ключа after."""
+    filters, params = [], [expression]
+    if group_id is not None:
+        filters.append('post.group_id = %s')
+        params.append(group_id)
+    if author_id is not None:
+        filters.append('post.author_id = %s')
+        params.append(author_id)
+    if after is not None:
+        sign = '>' if forward else '<'
+        filters.append(
+            f'(bm25({FTS_TABLE}) {sign} %s OR '
+            f'(bm25({FTS_TABLE}) = %s AND post.id {sign} %s))'
+        )
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit)
+    sql = SEARCH_SQL.format(
+        filters=''.join(f' AND {condition}' for condition in filters),
+        order='ASC' if forward else 'DESC',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+class SearchPaginator:
+    """Курсорная выдача результатов поиска по релевантности."""
+
+    def __init__(self, query, per_page, group_id=None, author_id=None):
+        self.expression = match_expression(query)
+        self.per_page = per_page
+        self.group_id = group_id
+        self.author_id = author_id
+
+    def _key(self, post):
+        return [post.search_score, post.pk]
+
+    def _parse_key(self, key):
+        if (isinstance(key, list) and len(key) == 2
+                and isinstance(key[0], (int, float))
+                and isinstance(key[1], int)):
+            return key
+        return None
+
+    def get_page(self, cursor=None):
+        direction, after = NEXT, None
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is not None:
+            after = self._parse_key(decoded[1])
+            if decoded[1] is None or after is not None:
+                direction = decoded[0]
+        forward = direction == NEXT
+
+        rows = []
+        if self.expression:
+            rows = search_ids(
+                self.expression, self.per_page + 1, self.group_id,
+                self.author_id, after, forward,
+            )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        object_list = []
+        for post_id, score in rows:
+            if post_id in posts:
+                post = posts[post_id]
+                post.search_score = score
+                object_list.append(post)
+
+        if forward:
+            has_next, has_previous = has_more, after is not None
+        else:
+            has_next, has_previous = after is not None, has_more
+        return KeysetPage(object_list, self, has_next, has_previous)
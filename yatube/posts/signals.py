@@ -0,0 +1,200 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models.signals import (post_delete, post_init, post_migrate,
+                                      post_save, pre_delete)
+from django.dispatch import Signal, receiver
+
+from . import archive, counters, lookups, search, thumbnails, timeline
+from .models import AuthorStats, Follow, Group, Post
+
+User = get_user_model()
+
+# bulk_create не шлёт post_save: массовые загрузки сообщают о новых
+# постах этим сигналом, чтобы счётчики и версии областей не отставали
+posts_bulk_created = Signal(providing_args=['posts'])
+
+
+def _loaded(instance):
+    """Автор и группа поста на момент загрузки из базы."""
+    return instance.__dict__.get('author_id'), instance.__dict__.get(
+        'group_id'
+    )
+
+
+@receiver(post_init, sender=Post)
+def remember_post_scopes(sender, instance, **kwargs):
+    instance._loaded_scopes = _loaded(instance)
+    instance._loaded_pub_date = instance.__dict__.get('pub_date')
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    current = (instance.author_id, instance.group_id)
+    new = set(counters.post_scopes(*current))
+    if created:
+        counters.change_counts(*current, 1)
+        archive.change(archive.post_buckets(*current, instance.pub_date))
+        counters.touch(new)
+        timeline.fan_out([instance])
+    else:
+        loaded = instance._loaded_scopes
+        # Переносим счёт только у изменившихся автора и группы
+        left = [old if old != now else None
+                for old, now in zip(loaded, current)]
+        came = [now if old != now else None
+                for old, now in zip(loaded, current)]
+        counters.change_counts(*left, -1, total=False)
+        counters.change_counts(*came, 1, total=False)
+        # Старый месяц вычитается, новый прибавляется: у неизменных
+        # областей сдвиги взаимно гасятся и запросов не дают
+        buckets = archive.post_buckets(
+            *loaded, instance._loaded_pub_date or instance.pub_date, -1
+        )
+        buckets.update(archive.post_buckets(*current, instance.pub_date))
+        archive.change(buckets)
+        counters.touch(set(counters.post_scopes(*loaded)) | new)
+    instance._loaded_scopes = current
+    instance._loaded_pub_date = instance.__dict__.get('pub_date')
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, raw=False, **kwargs):
+    """Миниатюры создаются в фоне после фиксации транзакции.
+
+    Готовые миниатюры sorl находит в хранилище ключей и не создаёт
+    заново, поэтому повторное сохранение поста почти ничего не стоит.
+    """
+    if instance.image and not raw:
+        post_id = instance.pk
+        transaction.on_commit(lambda: thumbnails.schedule(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_counts(*instance._loaded_scopes, -1)
+    if instance._loaded_pub_date is not None:
+        archive.change(archive.post_buckets(
+            *instance._loaded_scopes, instance._loaded_pub_date, -1
+        ))
+    counters.touch(counters.post_scopes(*instance._loaded_scopes))
+
+
+@receiver(posts_bulk_created)
+def count_bulk_created_posts(sender, posts, **kwargs):
+    authors, groups, buckets = Counter(), Counter(), Counter()
+    for post in posts:
+        buckets.update(
+            archive.post_buckets(post.author_id, post.group_id, post.pub_date)
+        )
+        authors[post.author_id] += 1
+        if post.group_id is not None:
+            groups[post.group_id] += 1
+    counters.change_counts(None, None, len(posts))
+    for author_id, added in authors.items():
+        counters.change_counts(author_id, None, added, total=False)
+    for group_id, added in groups.items():
+        counters.change_counts(None, group_id, added, total=False)
+    archive.change(buckets)
+    counters.touch(
+        [counters.ALL]
+        + [counters.author_scope(author_id) for author_id in authors]
+        + [counters.group_scope(group_id) for group_id in groups]
+    )
+    timeline.fan_out(posts)
+
+
+@receiver(post_save, sender=Follow)
+def follow_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.change_followers(instance.author_id, 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        counters.touch([counters.author_scope(instance.author_id)])
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_author(sender, instance, **kwargs):
+    timeline.change_followers(instance.author_id, -1)
+    timeline.drop(instance.user_id, instance.author_id)
+    counters.touch([counters.author_scope(instance.author_id)])
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def touch_author_pages(sender, instance, created, update_fields=None,
+                       raw=False, **kwargs):
+    """Имя автора выводится в ленте, группах и на странице поста.
+
+    Вход пользователя сохраняет только last_login: страницы
+    от этого не меняются.
+    """
+    if created or raw or update_fields == frozenset({'last_login'}):
+        return
+    counters.touch(counters.author_page_scopes(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_author_lookup(sender, instance, **kwargs):
+    lookups.authors.forget(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group_lookup(sender, instance, **kwargs):
+    lookups.groups.forget(instance)
+
+
+@receiver(post_init, sender=Group)
+def remember_group_label(sender, instance, **kwargs):
+    instance._loaded_label = (
+        instance.__dict__.get('slug'), instance.__dict__.get('title')
+    )
+
+
+@receiver(post_save, sender=Group)
+def touch_group_scope(sender, instance, created, **kwargs):
+    label = (instance.slug, instance.title)
+    if created or label == instance._loaded_label:
+        scopes = [counters.group_scope(instance.pk)]
+    else:
+        # Название и ссылка группы есть на ленте и в профилях авторов
+        scopes = counters.group_page_scopes(instance.pk)
+    counters.touch(scopes + [counters.GROUPS])
+    instance._loaded_label = label
+
+
+@receiver(pre_delete, sender=Group)
+def touch_group_pages(sender, instance, **kwargs):
+    """Пока посты ещё в группе: ссылки на неё уйдут со всех страниц."""
+    counters.touch(counters.group_page_scopes(instance.pk))
+
+
+@receiver(post_delete, sender=Group)
+def forget_group_scope(sender, instance, **kwargs):
+    counters.forget([counters.group_scope(instance.pk)])
+    archive.forget([counters.group_scope(instance.pk)])
+    counters.touch([counters.GROUPS])
+
+
+@receiver(post_migrate)
+def clear_lookups(sender, **kwargs):
+    """flush в тестах удаляет строки без сигналов post_delete."""
+    if sender.name == 'posts':
+        lookups.groups.cache.clear()
+        lookups.authors.cache.clear()
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """Возвращает триггеры поиска после пересборки таблицы постов."""
+    connection = connections[using]
+    if (sender.name == 'posts' and search.is_supported(connection)
+            and search.FTS_TABLE in connection.introspection.table_names()):
+        search.install(connection)
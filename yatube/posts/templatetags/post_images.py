@@ -0,0 +1,11 @@
+from django import template
+
+from .. import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, size):
+    """Миниатюра размера из thumbnails.SIZES или None без картинки."""
+    return thumbnails.thumbnail(image, size)
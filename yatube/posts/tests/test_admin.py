@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import PostPaginator
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(title=f'Группа {number}', slug=f'g{number}')
+            for number in range(5)
+        ]
+        cls.unused = Group.objects.create(title='Пустая', slug='unused')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_posts(self, count):
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {number}', author=self.admin,
+                group=self.groups[number % len(self.groups)],
+            )
+            for number in range(count)
+        )
+
+    def changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'), params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Строки с автором и группой не добавляют запросов"""
+        self.add_posts(5)
+        self.changelist()
+        _, few = self.changelist()
+        self.add_posts(50)
+        _, many = self.changelist()
+        self.assertEqual(few, many)
+
+    def test_group_column_renders_selected_group_only(self):
+        """Редактируемая группа не выводит список всех групп"""
+        self.add_posts(10)
+        response, _ = self.changelist()
+        self.assertContains(response, 'Группа 1')
+        self.assertNotContains(response, 'Пустая')
+
+    def test_filtered_count_is_limited(self):
+        self.add_posts(20)
+        group = self.groups[0]
+        with mock.patch.object(PostPaginator, 'limit', 3):
+            response, _ = self.changelist(group__id__exact=group.pk)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_date_hierarchy(self):
+        self.add_posts(3)
+        year = Post.objects.first().pub_date.year
+        response, _ = self.changelist(pub_date__year=year)
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_group_autocomplete(self):
+        response = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': 'Пуст'}
+        )
+        self.assertEqual(
+            [item['text'] for item in response.json()['results']], ['Пустая']
+        )
@@ -0,0 +1,126 @@
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, counters
+from ..models import Group, MonthBucket, Post
+from ..signals import posts_bulk_created
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Archivist')
+        cls.group = Group.objects.create(title='Архив', slug='archive')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.old = Post.objects.create(
+            text='Мартовский пост', author=cls.user, group=cls.group
+        )
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.make_aware(datetime(2025, 3, 10, 12))
+        )
+        cls.new = Post.objects.create(
+            text='Свежий пост', author=cls.user, group=cls.group
+        )
+        archive.rebuild()
+
+    def setUp(self):
+        cache.clear()
+        self.now = archive.month_of(timezone.now())
+
+    def stored(self):
+        return {
+            (scope, month): count
+            for scope, month, count in MonthBucket.objects.filter(
+                posts_count__gt=0
+            ).values_list('scope', 'month', 'posts_count')
+        }
+
+    def assertBucketsMatch(self):
+        self.assertEqual(self.stored(), dict(archive.actual()))
+
+    def test_buckets_follow_post_changes(self):
+        """Месяцы архива поддерживаются при создании, переносе и удалении"""
+        post = Post.objects.create(text='Ещё пост', author=self.user)
+        self.assertBucketsMatch()
+        post.group = self.other_group
+        post.save()
+        self.assertBucketsMatch()
+        self.assertEqual(
+            archive.months(counters.group_scope(self.other_group.pk)),
+            [(self.now, 1)],
+        )
+        post.delete()
+        self.assertBucketsMatch()
+
+    def test_bulk_created_posts_counted(self):
+        posts = [
+            Post(text=f'Пакет {i}', author=self.user, group=self.group)
+            for i in range(3)
+        ]
+        Post.objects.bulk_create(posts)
+        posts_bulk_created.send(sender=Post, posts=posts)
+        self.assertBucketsMatch()
+
+    def test_group_delete_forgets_buckets(self):
+        scope = counters.group_scope(self.group.pk)
+        Group.objects.get(pk=self.group.pk).delete()
+        self.assertFalse(MonthBucket.objects.filter(scope=scope).exists())
+        self.assertEqual(archive.months(counters.ALL)[0], (self.now, 1))
+
+    def test_month_page_lists_only_its_posts(self):
+        """Количество постов страницы архива берётся без COUNT(*)"""
+        url = reverse('posts:group_archive_month', args=['archive', 2025, 3])
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(list(response.context['page_obj']), [self.old])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+        response = Client().get(reverse('posts:archive_year', args=[2025]))
+        self.assertEqual(list(response.context['page_obj']), [self.old])
+        response = Client().get(
+            reverse('posts:profile_archive_year', args=['Archivist', 2024])
+        )
+        self.assertContains(response, 'За этот период постов нет')
+
+    def test_sidebar_shows_monthly_counts(self):
+        response = Client().get(reverse('posts:profile', args=['Archivist']))
+        self.assertEqual(
+            [(item['month'], item['posts_count'])
+             for item in response.context['archive']],
+            [(self.now, 1), (datetime(2025, 3, 1).date(), 1)],
+        )
+        self.assertContains(response, reverse(
+            'posts:profile_archive_month', args=['Archivist', 2025, 3]
+        ))
+        self.assertContains(response, reverse(
+            'posts:profile_archive_year', args=['Archivist', 2025]
+        ))
+
+    def test_invalid_period_not_found(self):
+        urls = (
+            '/archive/2025/13/', '/archive/2026/0/', '/archive/0/',
+            '/archive/9999/', '/group/archive/archive/2026/0/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(Client().get(url).status_code, 404)
+
+    def test_rebuild_fixes_drift(self):
+        MonthBucket.objects.update(posts_count=42)
+        MonthBucket.objects.filter(scope=counters.ALL).delete()
+        call_command('rebuild_post_counts', stdout=StringIO())
+        self.assertBucketsMatch()
@@ -0,0 +1,233 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cache_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Cached')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Cached', slug='cached')
+        cls.quiet = Group.objects.create(title='Quiet', slug='quiet')
+        Post.objects.create(text='First', author=cls.author, group=cls.group)
+        Post.objects.create(text='Quiet', author=cls.other, group=cls.quiet)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.guest_client = Client()
+        self.urls = {
+            'index': reverse('posts:main_page'),
+            'group': reverse('posts:posts_by_groups', args=['cached']),
+            'quiet': reverse('posts:posts_by_groups', args=['quiet']),
+            'author': reverse('posts:profile', args=['Cached']),
+            'other': reverse('posts:profile', args=['Other']),
+        }
+
+    def is_cached(self, url):
+        """Ответ из кеша отдаётся без отрисовки шаблона"""
+        return self.guest_client.get(url).context is None
+
+    def warm_up(self):
+        for url in self.urls.values():
+            self.assertFalse(self.is_cached(url), url)
+            self.assertTrue(self.is_cached(url), url)
+
+    def assertInvalidated(self, *names):
+        for name, url in self.urls.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.is_cached(url), name not in names)
+
+    def test_new_post_invalidates_only_its_scopes(self):
+        """Новый пост сбрасывает ленту, свою группу и профиль автора"""
+        self.warm_up()
+        Post.objects.create(text='Fresh', author=self.author, group=self.group)
+        self.assertInvalidated('index', 'group', 'author')
+        response = self.guest_client.get(self.urls['group'])
+        self.assertContains(response, 'Fresh')
+
+    def test_post_moved_between_groups(self):
+        """Перенос поста сбрасывает обе группы"""
+        self.warm_up()
+        post = Post.objects.get(text='First')
+        post.group = self.quiet
+        post.save()
+        self.assertInvalidated('index', 'group', 'quiet', 'author')
+
+    def test_group_description_invalidates_group(self):
+        """Описание группы есть только на её странице"""
+        self.warm_up()
+        self.quiet.description = 'New description'
+        self.quiet.save()
+        self.assertInvalidated('quiet')
+
+    def test_group_rename_invalidates_pages_with_its_links(self):
+        """Новые название и slug группы сбрасывают ленту и профили авторов"""
+        self.warm_up()
+        quiet = Group.objects.get(pk=self.quiet.pk)
+        quiet.title = 'Loud'
+        quiet.save()
+        self.assertInvalidated('index', 'quiet', 'other')
+        quiet.slug = 'loud'
+        quiet.save()
+        response = self.guest_client.get(self.urls['index'])
+        self.assertContains(response, reverse(
+            'posts:posts_by_groups', args=['loud']
+        ))
+
+    def test_group_delete_invalidates_pages_with_its_links(self):
+        self.warm_up()
+        Group.objects.get(pk=self.quiet.pk).delete()
+        response = self.guest_client.get(self.urls['index'])
+        self.assertIsNotNone(response.context)
+        self.assertNotContains(response, self.urls['quiet'])
+        self.assertFalse(self.is_cached(self.urls['other']))
+        self.assertTrue(self.is_cached(self.urls['author']))
+
+    def test_authorized_user_is_not_cached(self):
+        """Авторизованные пользователи получают свежую страницу"""
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.urls['index'])
+        self.assertIsNotNone(client.get(self.urls['index']).context)
+
+    def test_file_based_cache_backend(self):
+        """Кеш работает с файловым бэкендом"""
+        with self.settings(CACHES={**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir,
+        }}):
+            self.warm_up()
+            self.assertTrue(os.listdir(self.cache_dir))
+            post = Post.objects.get(text='Quiet')
+            post.delete()
+            self.assertInvalidated('index', 'quiet', 'other')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Conditional', password='secret'
+        )
+        cls.group = Group.objects.create(title='Cond', slug='cond')
+        cls.post = Post.objects.create(
+            text='Cond', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        caches['default'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.urls = (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', args=['cond']),
+            reverse('posts:profile', args=['Conditional']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def revalidate(self, client, url, response):
+        return client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Неизменившиеся страницы отвечают 304 без отрисовки"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 304)
+                self.assertIsNone(again.context)
+
+    def test_etag_differs_for_logged_in_user(self):
+        """Гость и авторизованный пользователь получают разные ETag"""
+        url = self.urls[0]
+        guest = self.guest_client.get(url)
+        response = self.revalidate(self.authorized_client, url, guest)
+        self.assertEqual(response.status_code, 200)
+
+    def test_logged_in_pages_validated_by_etag_only(self):
+        """If-Modified-Since гостя не даёт 304 авторизованному"""
+        url = self.urls[0]
+        guest = self.guest_client.get(url)
+        self.assertIn('Cookie', guest['Vary'])
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('Cookie', response['Vary'])
+        again = self.authorized_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=guest['Last-Modified']
+        )
+        self.assertEqual(again.status_code, 200)
+        again = self.revalidate(self.authorized_client, url, response)
+        self.assertEqual(again.status_code, 304)
+        self.assertIn('Cookie', again['Vary'])
+
+    def test_post_edit_changes_validators(self):
+        """Правка поста через post_edit меняет валидаторы"""
+        responses = {
+            url: self.authorized_client.get(url) for url in self.urls
+        }
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Edited', 'group': self.group.pk},
+        )
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again = self.revalidate(self.authorized_client, url, response)
+                self.assertEqual(again.status_code, 200)
+
+    def test_author_rename_changes_validators(self):
+        """Новое имя автора видно вместо 304 со старым"""
+        responses = {url: self.guest_client.get(url) for url in self.urls}
+        self.author.first_name = 'Renamed'
+        self.author.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 200)
+        self.assertContains(
+            self.guest_client.get(self.urls[3]), 'Renamed'
+        )
+
+    def test_login_keeps_validators(self):
+        response = self.guest_client.get(self.urls[0])
+        self.client.login(username='Conditional', password='secret')
+        again = self.revalidate(self.guest_client, self.urls[0], response)
+        self.assertEqual(again.status_code, 304)
+
+    def test_group_slug_change_changes_validators(self):
+        responses = {
+            url: self.guest_client.get(url)
+            for url in (self.urls[0], self.urls[2], self.urls[3])
+        }
+        self.group.slug = 'renamed'
+        self.group.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 200)
+                self.assertContains(again, '/group/renamed/')
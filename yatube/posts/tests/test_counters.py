@@ -0,0 +1,130 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters
+from ..models import AuthorStats, Follow, Group, Post, ScopeStats
+
+User = get_user_model()
+
+
+class PostCountersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='Counter')
+        self.author = User.objects.create_user(username='Author')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.other = Group.objects.create(title='Other', slug='other')
+        counters.posts_count(counters.ALL, Post.objects.all())
+
+    def assertCountsMatch(self):
+        self.assertEqual(
+            ScopeStats.objects.get(scope=counters.ALL).posts_count,
+            Post.objects.count(),
+        )
+        for group in (self.group, self.other):
+            group.refresh_from_db()
+            with self.subTest(group=group):
+                self.assertEqual(group.posts_count, group.posts.count())
+        for user in (self.user, self.author):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    AuthorStats.objects.get(user=user).posts_count,
+                    user.posts.count(),
+                )
+        self.assertEqual(counters.drift(), [])
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении поста"""
+        post = Post.objects.create(
+            text='Counted', author=self.user, group=self.group
+        )
+        Post.objects.create(text='No group', author=self.user)
+        self.assertCountsMatch()
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other
+        post.save()
+        self.assertCountsMatch()
+
+        post.author = self.author
+        post.group = None
+        post.save()
+        self.assertCountsMatch()
+
+        post.delete()
+        self.assertCountsMatch()
+
+    def test_group_delete_forgets_scope(self):
+        """Удаление группы удаляет её версию, пост остаётся в ленте"""
+        Post.objects.create(text='Text', author=self.user, group=self.group)
+        scope = counters.group_scope(self.group.pk)
+        self.group.delete()
+        self.assertFalse(ScopeStats.objects.filter(scope=scope).exists())
+        stats = AuthorStats.objects.get(user=self.user)
+        self.assertEqual(stats.posts_count, 1)
+
+    def test_commands_report_and_fix_drift(self):
+        """check_post_counters находит расхождения, --fix исправляет"""
+        Post.objects.create(text='Text', author=self.user, group=self.group)
+        Group.objects.update(posts_count=42)
+        AuthorStats.objects.filter(user=self.user).delete()
+        out = StringIO()
+        call_command('check_post_counters', stdout=out)
+        self.assertIn(counters.group_scope(self.group.pk), out.getvalue())
+        self.assertIn(counters.author_scope(self.user.pk), out.getvalue())
+        self.assertTrue(counters.drift())
+
+        call_command('check_post_counters', '--fix', stdout=StringIO())
+        self.assertCountsMatch()
+
+        ScopeStats.objects.update(posts_count=42)
+        call_command('rebuild_post_counts', stdout=StringIO())
+        self.assertCountsMatch()
+
+    def test_delete_with_drifted_zero_counters(self):
+        """Пост удаляется, даже если его счётчики уже разошлись до нуля"""
+        Post.objects.bulk_create(
+            [Post(text='Без сигнала', author=self.user, group=self.group)]
+        )
+        post = Post.objects.get(text='Без сигнала')
+        ScopeStats.objects.filter(scope=counters.ALL).update(posts_count=0)
+        post.delete()
+        self.assertEqual(AuthorStats.objects.get(user=self.user).posts_count,
+                         0)
+        call_command('check_post_counters', '--fix', stdout=StringIO())
+        self.assertCountsMatch()
+
+    def test_unfollow_with_drifted_zero_followers(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        AuthorStats.objects.filter(user=self.author).update(
+            followers_count=0
+        )
+        Follow.objects.filter(user=self.user).delete()
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).followers_count, 0
+        )
+
+    def test_profile_reads_count_without_count_query(self):
+        """Профиль берёт количество постов из счётчика"""
+        Post.objects.create(text='Text', author=self.user)
+        url = reverse('posts:profile', kwargs={'username': 'Counter'})
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_post_detail_shows_author_posts_count(self):
+        """Страница поста показывает число постов автора"""
+        post = Post.objects.create(text='Text', author=self.user)
+        Post.objects.create(text='More', author=self.user)
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['posts_count'], 2)
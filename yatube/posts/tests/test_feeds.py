@@ -0,0 +1,104 @@
+import json
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='Feeder', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(title='Feed & Co', slug='feed')
+        for i in range(3):
+            Post.objects.create(
+                text=f'Запись <{i}>', author=cls.author, group=cls.group
+            )
+        cls.first = Post.objects.order_by('pk').first()
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.urls = (
+            reverse('posts:feed'),
+            reverse('posts:group_feed', args=['feed']),
+            reverse('posts:profile_feed', args=['Feeder']),
+        )
+
+    def get(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_formats_are_well_formed(self):
+        """RSS, Atom и JSON Feed отдаются целиком и корректны"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                _, body = self.get(url)
+                self.assertEqual(
+                    len(ElementTree.fromstring(body).findall('.//item')), 3
+                )
+                _, body = self.get(url, format='atom')
+                atom = '{http://www.w3.org/2005/Atom}entry'
+                self.assertEqual(
+                    len(ElementTree.fromstring(body).findall(atom)), 3
+                )
+                _, body = self.get(url, format='json')
+                self.assertEqual(len(json.loads(body)['items']), 3)
+
+    def test_since_returns_only_newer_posts(self):
+        """since отдаёт только более новые записи"""
+        Post.objects.filter(pk=self.first.pk).update(
+            pub_date=self.first.pub_date - timedelta(days=1)
+        )
+        since = (self.first.pub_date - timedelta(hours=1)).isoformat()
+        _, body = self.get(self.urls[0], format='json', since=since)
+        self.assertEqual(len(json.loads(body)['items']), 2)
+        response = self.guest_client.get(self.urls[0], {'since': 'вчера'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_since_accepts_date_only(self):
+        """since=ГГГГ-ММ-ДД отдаёт записи с начала этого дня"""
+        Post.objects.filter(pk=self.first.pk).update(
+            pub_date=self.first.pub_date - timedelta(days=3)
+        )
+        today = timezone.localdate()
+        for since, expected in ((today, 2), (today - timedelta(days=10), 3)):
+            with self.subTest(since=since):
+                _, body = self.get(
+                    self.urls[0], format='json', since=since.isoformat()
+                )
+                self.assertEqual(len(json.loads(body)['items']), expected)
+        for since in ('2020-13-45', '2020-01-01T25:00:00'):
+            with self.subTest(since=since):
+                response = self.guest_client.get(
+                    self.urls[0], {'since': since}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_etag_not_modified_until_new_post(self):
+        """Повторный запрос с ETag получает 304 до появления записи"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response, _ = self.get(url)
+                etag = response['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                Post.objects.create(
+                    text='Новая', author=self.author, group=self.group
+                )
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+from ..signals import posts_bulk_created
+
+User = get_user_model()
+
+
+class FollowTimelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.stranger = User.objects.create_user(username='Stranger')
+        cls.author = User.objects.create_user(username='Writer')
+        cls.star = User.objects.create_user(username='Star')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def feed(self, client, **params):
+        response = client.get(reverse('posts:follow_index'), params)
+        return [post.text for post in response.context['page_obj']]
+
+    def follow(self, client, author):
+        client.get(reverse('posts:profile_follow', args=[author.username]))
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка меняют Follow и счётчик подписчиков"""
+        self.follow(self.reader_client, self.author)
+        self.follow(self.reader_client, self.author)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.followers_count, 1)
+
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+        stats.refresh_from_db()
+        self.assertEqual(stats.followers_count, 0)
+
+    def test_cannot_follow_self(self):
+        self.follow(self.reader_client, self.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_reaches_followers_only(self):
+        """Новый пост попадает в ленту подписчика, но не в чужую"""
+        self.follow(self.reader_client, self.author)
+        Post.objects.create(text='Для подписчиков', author=self.author)
+        self.assertEqual(self.feed(self.reader_client), ['Для подписчиков'])
+        self.assertEqual(self.feed(self.stranger_client), [])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        Post.objects.create(text='Старый пост', author=self.author)
+        self.follow(self.reader_client, self.author)
+        self.assertEqual(self.feed(self.reader_client), ['Старый пост'])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(self.reader_client), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_celebrity_posts_merged_at_read_time(self):
+        """Посты популярного автора не раскладываются, но видны в ленте"""
+        self.follow(self.reader_client, self.author)
+        self.follow(self.reader_client, self.star)
+        self.follow(self.stranger_client, self.star)
+        for number in range(6):
+            author = self.star if number % 2 else self.author
+            Post.objects.create(text=f'Пост {number}', author=author)
+        self.assertFalse(
+            TimelineEntry.objects.filter(author=self.star).exists()
+        )
+        with mock.patch('posts.views.AMOUNT', 4):
+            pages = (
+                self.feed(self.reader_client, page=1)
+                + self.feed(self.reader_client, page=2)
+            )
+        self.assertEqual(
+            pages, [f'Пост {number}' for number in reversed(range(6))]
+        )
+
+    def test_bulk_created_posts_fan_out(self):
+        self.follow(self.reader_client, self.author)
+        posts = [
+            Post(text=f'Импорт {number}', author=self.author)
+            for number in range(3)
+        ]
+        Post.objects.bulk_create(posts)
+        posts_bulk_created.send(sender=Post, posts=posts)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3
+        )
+
+    def test_follow_index_requires_login(self):
+        response = Client().get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
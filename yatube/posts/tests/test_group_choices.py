@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..forms import PostForm
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupChoicesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Chooser')
+        cls.group = Group.objects.create(title='Коты', slug='cats')
+        Group.objects.create(title='Собаки', slug='dogs')
+        cls.post = Post.objects.create(
+            text='Пост про котов', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def titles(self, form):
+        return [str(label) for _, label in form.fields['group'].choices][1:]
+
+    def test_choices_cached_between_renders(self):
+        """Повторная отрисовка читает только версию списка групп"""
+        str(PostForm()['group'])
+        with self.assertNumQueries(1):
+            html = str(PostForm()['group'])
+        self.assertIn('Собаки', html)
+
+    def test_group_changes_invalidate_choices(self):
+        self.assertEqual(self.titles(PostForm()), ['Коты', 'Собаки'])
+        Group.objects.create(title='Ежи', slug='hedgehogs')
+        self.group.title = 'Кошки'
+        self.group.save()
+        Group.objects.get(slug='dogs').delete()
+        self.assertEqual(self.titles(PostForm()), ['Ежи', 'Кошки'])
+
+    def test_edit_form_shows_post(self):
+        response = self.client.get(
+            reverse('posts:post_edit', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Пост про котов</textarea>')
+        self.assertContains(
+            response, f'<option value="{self.group.pk}" selected>'
+        )
+
+    @override_settings(GROUP_SEARCH=True)
+    def test_search_mode_renders_selected_group_only(self):
+        """С GROUP_SEARCH форма не выводит и не читает список групп"""
+        with self.assertNumQueries(0):
+            html = str(PostForm()['group'])
+        self.assertNotIn('Коты', html)
+        with self.assertNumQueries(1):
+            html = str(PostForm(instance=self.post)['group'])
+        self.assertIn('Коты', html)
+        self.assertNotIn('Собаки', html)
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertContains(response, 'id="id_group_search"')
+
+    def test_group_search(self):
+        response = self.client.get(
+            reverse('posts:group_search'), {'q': 'кот'}
+        )
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.group.pk, 'title': 'Коты'}],
+        )
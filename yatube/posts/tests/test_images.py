@@ -0,0 +1,140 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def run_on_commit(callback):
+    callback()
+
+
+class TempMediaMixin:
+    """Загрузки тестов пишутся во временную папку вне проекта."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class PostImageTests(TempMediaMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Painter')
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.THUMBNAIL_CACHE].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, name='small.gif'):
+        with mock.patch('posts.signals.transaction.on_commit', run_on_commit):
+            self.client.post(reverse('posts:post_create'), {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name, SMALL_GIF, content_type='image/gif'
+                ),
+            })
+        return Post.objects.get(text='Пост с картинкой')
+
+    def test_upload_creates_all_thumbnails(self):
+        """После загрузки в хранилище есть миниатюры всех размеров"""
+        post = self.upload()
+        self.assertTrue(post.image.name.startswith('posts/small'))
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            for size in thumbnails.SIZES:
+                with self.subTest(size=size):
+                    self.assertTrue(
+                        thumbnails.thumbnail(post.image, size).exists()
+                    )
+        get_image.assert_not_called()
+
+    def test_listing_does_not_touch_image_backend(self):
+        """Лента и страница поста берут миниатюры из кеша"""
+        post = self.upload()
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[post.pk]),
+        )
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            for url in urls:
+                with self.subTest(url=url):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                    self.assertContains(response, '<img class="card-img')
+                    self.assertFalse([
+                        query for query in queries.captured_queries
+                        if 'thumbnail_kvstore' in query['sql']
+                    ])
+        get_image.assert_not_called()
+
+    def test_non_image_rejected(self):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Не картинка',
+            'image': SimpleUploadedFile(
+                'notes.txt', b'text', content_type='text/plain'
+            ),
+        })
+        self.assertFalse(Post.objects.filter(text='Не картинка').exists())
+
+
+@override_settings(THUMBNAIL_WORKERS=1)
+class BackgroundThumbnailTests(TempMediaMixin, TransactionTestCase):
+    """Поток пула пишет через своё соединение: данные теста зафиксированы"""
+
+    def setUp(self):
+        caches[settings.THUMBNAIL_CACHE].clear()
+        self.user = User.objects.create_user(username='Painter')
+
+    def test_worker_creates_all_thumbnails(self):
+        with mock.patch('posts.signals.transaction.on_commit'):
+            post = Post.objects.create(
+                text='Пост с картинкой', author=self.user,
+                image=SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+        thumbnails.schedule(post.pk).result(timeout=10)
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            for size in thumbnails.SIZES:
+                with self.subTest(size=size):
+                    self.assertTrue(
+                        thumbnails.thumbnail(post.image, size).exists()
+                    )
+        get_image.assert_not_called()
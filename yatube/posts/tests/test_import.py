@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import counters
+from ..models import AuthorStats, Follow, Group, Post, TimelineEntry
+from ..signals import posts_bulk_created
+
+User = get_user_model()
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='Importer')
+        self.group = Group.objects.create(title='History', slug='history')
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_jsonl_import_keeps_dates_and_counters(self):
+        """JSONL: даты сохраняются, счётчики обновляются, мусор пропущен"""
+        rows = [
+            {'text': 'Old post', 'author': 'Importer', 'group': 'history',
+             'pub_date': '2001-02-03T04:05:06+00:00'},
+            {'text': 'Newer post', 'author': 'Importer'},
+            {'text': 'Unknown author', 'author': 'Nobody'},
+            {'text': 'Unknown group', 'author': 'Importer', 'group': 'no'},
+            {'author': 'Importer'},
+        ]
+        lines = [json.dumps(row) for row in rows] + ['not json']
+        path = self.write('posts.jsonl', '\n'.join(lines))
+        output = self.run_import(path, '--batch-size', '2')
+
+        self.assertIn('создано 2, пропущено 4', output)
+        old = Post.objects.get(text='Old post')
+        self.assertEqual(old.pub_date.year, 2001)
+        self.assertEqual(old.group, self.group)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(AuthorStats.objects.get(user=self.user).posts_count,
+                         2)
+        self.assertEqual(counters.drift(), [])
+
+    def test_csv_import_resumes_from_checkpoint(self):
+        """CSV: повторный запуск продолжает с контрольной точки"""
+        path = self.write(
+            'posts.csv',
+            'text,author,group\n'
+            + ''.join(f'Row {i},Importer,history\n' for i in range(5)),
+        )
+        checkpoint = os.path.join(self.folder, 'import.checkpoint')
+        with open(checkpoint, 'w') as state:
+            state.write('3')
+        self.run_import(path, '--checkpoint', checkpoint)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Row 3', 'Row 4'],
+        )
+        with open(checkpoint) as state:
+            self.assertEqual(state.read(), '5')
+
+        self.run_import(path, '--checkpoint', checkpoint)
+        self.assertEqual(Post.objects.count(), 2)
+
+    @override_settings(TIMELINE_BACKFILL=0)
+    def test_backdated_batches_fan_out_only_imported_posts(self):
+        """В ленты попадают только загруженные посты, а не история автора"""
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        history = Post.objects.create(text='History', author=self.user)
+        Post.objects.filter(pk=history.pk).update(
+            pub_date=timezone.make_aware(datetime(2005, 1, 1))
+        )
+        TimelineEntry.objects.all().delete()
+        rows = [
+            {'text': f'Old {number}', 'author': 'Importer',
+             'pub_date': f'200{number}-01-01T00:00:00+00:00'}
+            for number in range(4)
+        ]
+        path = self.write(
+            'old.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        self.run_import(path, '--batch-size', '2')
+        self.assertEqual(
+            sorted(TimelineEntry.objects.filter(user=reader).values_list(
+                'post__text', flat=True
+            )),
+            ['Old 0', 'Old 1', 'Old 2', 'Old 3'],
+        )
+
+    def test_import_does_not_touch_model_field(self):
+        """Даты сохраняются без отключения auto_now_add у поля модели"""
+        field = Post._meta.get_field('pub_date')
+        seen = []
+
+        def check_field(sender, posts, **kwargs):
+            seen.append(field.auto_now_add)
+
+        posts_bulk_created.connect(check_field)
+        self.addCleanup(posts_bulk_created.disconnect, check_field)
+        path = self.write('old.jsonl', json.dumps({
+            'text': 'Old', 'author': 'Importer',
+            'pub_date': '1999-12-31T23:59:59+00:00',
+        }))
+        self.run_import(path)
+        self.assertEqual(seen, [True])
+        self.assertEqual(Post.objects.get(text='Old').pub_date.year, 1999)
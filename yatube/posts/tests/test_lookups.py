@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import lookups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class LookupCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Looker')
+        cls.group = Group.objects.create(title='Коты', slug='cats')
+
+    def setUp(self):
+        cache.clear()
+        lookups.groups.cache.clear()
+        lookups.authors.cache.clear()
+        self.client = Client()
+
+    def test_repeated_lookup_skips_database(self):
+        lookups.groups.get('cats')
+        with self.assertNumQueries(0):
+            group = lookups.groups.get('cats')
+        self.assertEqual(group, self.group)
+        self.assertIsNot(group, lookups.groups.get('cats'))
+
+    def test_volatile_field_loaded_from_database(self):
+        """posts_count не кешируется: счётчик меняется без сигналов"""
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        lookups.groups.get('cats')
+        group = lookups.groups.get('cats')
+        with self.assertNumQueries(1):
+            self.assertEqual(group.posts_count, 1)
+
+    def test_missing_value_cached(self):
+        with self.assertRaises(Http404):
+            lookups.groups.get('dogs')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            lookups.groups.get('dogs')
+        Group.objects.create(title='Собаки', slug='dogs')
+        self.assertEqual(lookups.groups.get('dogs').title, 'Собаки')
+
+    def test_changes_invalidate_cache(self):
+        lookups.groups.get('cats')
+        lookups.authors.get('Looker')
+        self.group.slug = 'cats-new'
+        self.group.save()
+        self.user.username = 'Renamed'
+        self.user.save()
+        self.assertIsNone(lookups.groups.find('cats'))
+        self.assertIsNone(lookups.authors.find('Looker'))
+        self.assertEqual(lookups.authors.get('Renamed'), self.user)
+        Group.objects.get(pk=self.group.pk).delete()
+        self.assertIsNone(lookups.groups.find('cats-new'))
+
+    def test_hits_reported_in_server_timing(self):
+        url = reverse('posts:posts_by_groups', args=['cats'])
+        first = self.client.get(url)
+        self.assertIn('group_lookup.miss;desc="1"', first['Server-Timing'])
+        cache.clear()
+        second = self.client.get(url)
+        self.assertIn('group_lookup.hit', second['Server-Timing'])
+        self.assertNotIn('group_lookup.miss', second['Server-Timing'])
@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive, urls
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+POSTS_TOTAL = 120
+PAGE_SIZES = (10, 100)
+# Сессия авторизованного клиента лежит в кеше 'sessions', пользователь —
+# в кеше процесса users.auth, поэтому авторизация запросов не добавляет
+AUTH_QUERIES = 0
+
+# Максимум SQL-запросов на адрес, не считая авторизации.
+# Ленты и страница поста дополнительно читают версию области
+# для условного GET и кеша страниц, форма поста — версию списка групп.
+# Группа по slug и автор по username берутся из кеша процесса posts.lookups,
+# колонка архива читает месяцы области из posts.archive
+QUERY_BUDGET = {
+    'main_page': 4,
+    'posts_by_groups': 3,
+    'profile': 3,
+    'feed': 2,
+    'group_feed': 2,
+    'profile_feed': 2,
+    'archive_year': 3,
+    'archive_month': 3,
+    'group_archive_year': 3,
+    'group_archive_month': 3,
+    'profile_archive_year': 3,
+    'profile_archive_month': 3,
+    'search': 2,
+    'post_detail': 3,
+    'group_search': 1,
+    'post_create': 1,
+    'post_edit': 2,
+    'follow_index': 5,
+    'profile_follow': 1,
+    'profile_unfollow': 1,
+}
+
+
+@override_settings(TIMELINE_FANOUT_LIMIT=2)
+class QueryBudgetTests(TestCase):
+    """Число запросов каждого адреса posts не зависит от размера страницы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='Budget', first_name='Bud', last_name='Get'
+        )
+        cls.group = Group.objects.create(title='Budget', slug='budget')
+        Post.objects.bulk_create(
+            Post(text=f'Budget {i}', author=cls.user, group=cls.group)
+            for i in range(POSTS_TOTAL)
+        )
+        # bulk_create без posts_bulk_created не трогает месяцы архива
+        archive.rebuild()
+        cls.post = Post.objects.first()
+        # Лента подписок: посты одного автора раскладываются по лентам,
+        # второй популярен и подмешивается при чтении
+        fan = User.objects.create_user(username='Fan')
+        for username in ('Fanned', 'Famous'):
+            author = User.objects.create_user(username=username)
+            Follow.objects.create(user=cls.user, author=author)
+            if username == 'Famous':
+                Follow.objects.create(user=fan, author=author)
+            for i in range(POSTS_TOTAL):
+                Post.objects.create(text=f'{username} {i}', author=author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def url_for(self, name):
+        now = timezone.localtime()
+        year = {'year': now.year}
+        month = {'year': now.year, 'month': now.month}
+        kwargs = {
+            'archive_year': year,
+            'archive_month': month,
+            'group_archive_year': {'slug': self.group.slug, **year},
+            'group_archive_month': {'slug': self.group.slug, **month},
+            'profile_archive_year': {'username': self.user.username, **year},
+            'profile_archive_month': {
+                'username': self.user.username, **month
+            },
+            'posts_by_groups': {'slug': self.group.slug},
+            'group_feed': {'slug': self.group.slug},
+            'profile': {'username': self.user.username},
+            'profile_feed': {'username': self.user.username},
+            'post_detail': {'post_id': self.post.pk},
+            'post_edit': {'post_id': self.post.pk},
+            'profile_follow': {'username': self.user.username},
+            'profile_unfollow': {'username': self.user.username},
+        }
+        queries = {
+            'search': '?q=Budget&group=budget&author=Budget',
+            'feed': '?full=1',
+            'group_feed': '?full=1',
+            'profile_feed': '?full=1',
+        }
+        return (
+            reverse(f'posts:{name}', kwargs=kwargs.get(name))
+            + queries.get(name, '')
+        )
+
+    def count_queries(self, client, url):
+        # Первый запрос прогревает ленивые счётчики постов,
+        # кеш страниц сбрасывается, чтобы мерить саму отрисовку
+        client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        # Гость на закрытых адресах получает редирект на логин
+        self.assertIn(response.status_code, (200, 302), url)
+        return len(queries)
+
+    def test_every_url_has_budget(self):
+        """Для каждого адреса posts/urls.py задан бюджет запросов"""
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGET))
+
+    def test_queries_within_budget_for_any_page_size(self):
+        """Бюджет соблюдается и не растёт с размером страницы"""
+        clients = (
+            (self.guest_client, 0),
+            (self.authorized_client, AUTH_QUERIES),
+        )
+        for name, budget in QUERY_BUDGET.items():
+            for client, extra in clients:
+                url = self.url_for(name)
+                counts = set()
+                for size in PAGE_SIZES:
+                    with mock.patch('posts.views.AMOUNT', size):
+                        counts.add(self.count_queries(client, url))
+                with self.subTest(url=url, authorized=bool(extra)):
+                    self.assertEqual(len(counts), 1, counts)
+                    self.assertLessEqual(counts.pop(), budget + extra)
@@ -0,0 +1,80 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..common import NEXT, PREVIOUS, encode_cursor
+from ..models import Group, Post
+
+User = get_user_model()
+
+POSTS_TABLE = Post._meta.db_table
+# Полный проход таблицы: SCAN без USING INDEX / USING COVERING INDEX
+FULL_SCAN = re.compile(rf'\bSCAN (TABLE )?{POSTS_TABLE}\b(?! USING)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class PostQueryPlanTests(TestCase):
+    """Запросы к постам из views идут по индексам без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='PlanAuthor')
+        cls.group = Group.objects.create(title='Plan', slug='plan')
+        cls.post = Post.objects.create(
+            text='Plan text', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or POSTS_TABLE not in sql:
+                continue
+            checked += 1
+            plan = '\n'.join(self.explain(sql))
+            self.assertNotRegex(plan, FULL_SCAN, f'{sql}\n{plan}')
+            self.assertNotIn(TEMP_SORT, plan, f'{sql}\n{plan}')
+        self.assertTrue(checked, f'{url} не обращался к {POSTS_TABLE}')
+
+    def test_listing_pages_use_indexes(self):
+        """Ленты по номеру страницы и по курсору используют индексы"""
+        key = [self.post.pub_date.isoformat(), self.post.pk]
+        cursors = (
+            {},
+            {'page': 2},
+            {'cursor': encode_cursor(NEXT, key)},
+            {'cursor': encode_cursor(PREVIOUS, key)},
+            {'cursor': encode_cursor(PREVIOUS, None)},
+        )
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:posts_by_groups', kwargs={'slug': 'plan'}),
+            reverse('posts:profile', kwargs={'username': 'PlanAuthor'}),
+        )
+        for url in urls:
+            for params in cursors:
+                with self.subTest(url=url, params=params):
+                    self.assertIndexedPlans(url, params)
+
+    def test_post_detail_uses_primary_key(self):
+        """Страница поста ищет запись по первичному ключу"""
+        self.assertIndexedPlans(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..common import NEXT, encode_cursor
+from ..models import Group, Post
+from ..search import match_expression
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Writer')
+        cls.other = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Cats', slug='cats')
+        cls.cats = [
+            Post.objects.create(
+                text=f'Кошка номер {i}', author=cls.author, group=cls.group
+            )
+            for i in range(12)
+        ]
+        cls.dogs = Post.objects.create(text='Собака и кошки', author=cls.other)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.url = reverse('posts:search')
+
+    def found(self, **params):
+        response = self.guest_client.get(self.url, params)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_match_expression_quotes_user_input(self):
+        """Операторы FTS5 из запроса не выполняются"""
+        self.assertEqual(match_expression('a OR b*'), '"a" "OR" "b"*')
+        self.assertEqual(match_expression('"); --'), '')
+
+    def test_search_and_prefix(self):
+        """Поиск по слову и по началу слова"""
+        self.assertEqual(self.found(q='собака'), [self.dogs.pk])
+        self.assertEqual(len(self.found(q='кош*')), 10)
+        self.assertEqual(self.found(q='нет-такого'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        post = Post.objects.get(pk=self.dogs.pk)
+        post.text = 'Попугай'
+        post.save()
+        self.assertEqual(self.found(q='собака'), [])
+        self.assertEqual(self.found(q='попугай'), [self.dogs.pk])
+        post.delete()
+        self.assertEqual(self.found(q='попугай'), [])
+
+    def test_filters_by_group_and_author(self):
+        """Фильтры по группе и автору"""
+        self.assertNotIn(self.dogs.pk, self.found(q='кош*', group='cats'))
+        self.assertEqual(self.found(q='кош*', author='Reader'),
+                         [self.dogs.pk])
+        response = self.guest_client.get(self.url, {'q': 'x', 'group': 'no'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_pages_cover_all_results(self):
+        """Курсоры проходят всю выдачу без повторов"""
+        seen = []
+        cursor = encode_cursor(NEXT, None)
+        while cursor:
+            response = self.guest_client.get(
+                self.url, {'q': 'кош*', 'cursor': cursor}
+            )
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            cursor = page_obj.next_cursor
+        expected = {post.pk for post in self.cats} | {self.dogs.pk}
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%88%2A&amp;cursor=')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты через индекс"""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.dogs])
@@ -1,8 +1,14 @@
+from unittest import mock
+
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from ..common import NEXT, PREVIOUS, CountedPaginator, encode_cursor
 from ..models import Group, Post
 
 TEST_OF_POST = 13
@@ -104,6 +110,187 @@ class PaginatorViewsTest(TestCase):
             )
 
 
+class KeysetPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='CursorName')
+        cls.group = Group.objects.create(
+            title='Cursor Group',
+            slug='cursor_group',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Cursor text {i}',
+                group=cls.group,
+                author=cls.user,
+            )
+            for i in range(TEST_OF_POST)
+        ]
+        # Одинаковая дата у всех постов: порядок держится на id
+        Post.objects.update(pub_date=cls.posts[0].pub_date)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def collect(self, url, cursor_name):
+        """Обходит ленту по курсорам и возвращает id постов"""
+        seen = []
+        response = self.guest_client.get(url, {'cursor': 'bad'})
+        page_obj = response.context['page_obj']
+        seen.extend(post.pk for post in page_obj)
+        while getattr(page_obj, cursor_name):
+            response = self.guest_client.get(
+                url, {'cursor': getattr(page_obj, cursor_name)}
+            )
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+        return seen
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсоры проходят ленту без пропусков и повторов"""
+        expected = sorted((post.pk for post in self.posts), reverse=True)
+        pages = (
+            reverse('posts:main_page'),
+            reverse('posts:profile', kwargs={'username': 'CursorName'}),
+            reverse('posts:posts_by_groups', kwargs={'slug': 'cursor_group'}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                self.assertEqual(self.collect(page, 'next_cursor'), expected)
+
+    def test_malformed_cursor_keys_serve_first_page(self):
+        """Курсор с ключом не тех типов даёт первую страницу, а не 500"""
+        date = self.posts[0].pub_date.isoformat()
+        keys = (
+            [123, 1],
+            [date, 'abc'],
+            [date, None],
+            [date, [1]],
+            [date, True],
+            ['2020-13-45T00:00:00', 1],
+            [None, 1],
+        )
+        first = [post.pk for post in sorted(
+            self.posts, key=lambda post: post.pk, reverse=True
+        )][:SHOULD_BE]
+        url = reverse('posts:main_page')
+        for key in keys:
+            for direction in (NEXT, PREVIOUS):
+                with self.subTest(key=key, direction=direction):
+                    response = self.guest_client.get(
+                        url, {'cursor': encode_cursor(direction, key)}
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        [post.pk for post in response.context['page_obj']],
+                        first,
+                    )
+
+    def test_numbered_page_links_to_cursor(self):
+        """С первой страницы по номеру дальше листают по курсору"""
+        url = reverse('posts:main_page')
+        response = self.guest_client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertContains(response, f'cursor={page_obj.next_cursor}')
+        self.assertContains(response, f'cursor={page_obj.last_cursor}')
+        seen = [post.pk for post in page_obj]
+        while page_obj.next_cursor:
+            response = self.guest_client.get(
+                url, {'cursor': page_obj.next_cursor}
+            )
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+        self.assertEqual(
+            seen, sorted((post.pk for post in self.posts), reverse=True)
+        )
+        second = self.guest_client.get(url, {'page': 2}).context['page_obj']
+        back = self.guest_client.get(url, {'cursor': second.previous_cursor})
+        self.assertEqual(
+            [post.pk for post in back.context['page_obj']],
+            seen[:SHOULD_BE],
+        )
+
+    def test_keyset_page_has_no_numbers(self):
+        """Курсорная страница не падает на методах с номерами"""
+        url = reverse('posts:main_page')
+        cursor = encode_cursor(NEXT, None)
+        page_obj = self.guest_client.get(
+            url, {'cursor': cursor}
+        ).context['page_obj']
+        self.assertIsNone(page_obj.next_page_number())
+        self.assertIsNone(page_obj.previous_page_number())
+        self.assertIsNone(page_obj.start_index())
+        self.assertIsNone(page_obj.end_index())
+
+    def test_cursor_last_and_previous_pages(self):
+        """Последняя страница и шаг назад по курсору"""
+        url = reverse('posts:main_page')
+        first = self.guest_client.get(url, {'cursor': 'bad'})
+        last_cursor = first.context['page_obj'].last_cursor
+        last = self.guest_client.get(url, {'cursor': last_cursor})
+        last_page = last.context['page_obj']
+        self.assertEqual(len(last_page), SHOULD_BE)
+        self.assertFalse(last_page.has_next())
+        self.assertTrue(last_page.has_previous())
+
+        previous = self.guest_client.get(
+            url, {'cursor': last_page.previous_cursor}
+        )
+        previous_page = previous.context['page_obj']
+        self.assertEqual(len(previous_page), TEST_OF_POST - SHOULD_BE)
+        self.assertFalse(previous_page.has_previous())
+        self.assertEqual(
+            previous_page[0].pk, max(post.pk for post in self.posts)
+        )
+
+    def test_cursor_page_does_not_count(self):
+        """Курсорная страница не выполняет COUNT(*)"""
+        url = reverse('posts:main_page')
+        cursor = encode_cursor(NEXT, None)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url, {'cursor': cursor})
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+
+class ElidedPageRangeTest(TestCase):
+    def test_elided_range_is_bounded(self):
+        """Номера страниц сжимаются до окна вокруг текущей"""
+        ellipsis = CountedPaginator.ELLIPSIS
+        paginator = CountedPaginator(range(10 ** 6), 10, count=10 ** 6)
+        expected = {
+            1: [1, 2, 3, ellipsis, 100000],
+            4: [1, 2, 3, 4, 5, 6, ellipsis, 100000],
+            500: [1, ellipsis, 498, 499, 500, 501, 502, ellipsis, 100000],
+            100000: [1, ellipsis, 99998, 99999, 100000],
+        }
+        for number, pages in expected.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), pages
+                )
+        small = CountedPaginator(range(30), 10)
+        self.assertEqual(list(small.get_elided_page_range(2)), [1, 2, 3])
+
+    def test_paginator_html_does_not_grow_with_pages(self):
+        """Размер ответа не зависит от числа страниц"""
+        user = User.objects.create_user(username='Many')
+        Post.objects.bulk_create(
+            Post(text='Many', author=user) for _ in range(30)
+        )
+        client = Client()
+        client.force_login(user)
+        sizes = []
+        for amount in (10, 1):
+            with mock.patch('posts.views.AMOUNT', amount):
+                response = client.get(reverse('posts:main_page'), {'page': 2})
+            page_links = response.content.count(b'class="page-item')
+            sizes.append(page_links)
+        self.assertContains(response, CountedPaginator.ELLIPSIS)
+        self.assertLessEqual(sizes[1], sizes[0] + 4)
+
+
 class PostPagesTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -124,6 +311,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()  # Неавторизованный пользователь
         self.authorized_client = Client()  # второй клиент
         self.authorized_client.force_login(self.user)  # Авторизуем пользовател
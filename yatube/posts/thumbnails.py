@@ -0,0 +1,72 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from sorl.thumbnail import get_thumbnail
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Все размеры, которые выводят шаблоны: {% post_thumbnail post.image 'list' %}
+SIZES = {
+    'list': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('1280', {'upscale': False}),
+}
+
+_executor = None
+_lock = threading.Lock()
+
+
+def thumbnail(image, size):
+    """Миниатюра картинки нужного размера или None без картинки."""
+    if not image:
+        return None
+    geometry, options = SIZES[size]
+    return get_thumbnail(image, geometry, **options)
+
+
+def generate(post_id):
+    """Создаёт все миниатюры поста и записывает их в хранилище sorl."""
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is None or not post.image:
+            return
+        for size in SIZES:
+            thumbnail(post.image, size)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры поста %s', post_id)
+
+
+def _generate_in_worker(post_id):
+    try:
+        generate(post_id)
+    finally:
+        # Соединения потока пула не закрываются обработчиком запроса
+        connections.close_all()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def schedule(post_id):
+    """Ставит создание миниатюр в фоновый пул.
+
+    THUMBNAIL_WORKERS = 0 создаёт их сразу, в текущем потоке.
+    """
+    if not settings.THUMBNAIL_WORKERS:
+        generate(post_id)
+        future = Future()
+        future.set_result(None)
+        return future
+    return executor().submit(_generate_in_worker, post_id)
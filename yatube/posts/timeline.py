@@ -0,0 +1,175 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import Sum
+
+from . import counters
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+# Дат в одном IN: старые сборки SQLite принимают до 999 параметров
+DATES_CHUNK = 500
+
+
+def is_celebrity(followers_count):
+    """Авторам с множеством подписчиков лента не раскладывается."""
+    return followers_count >= settings.TIMELINE_FANOUT_LIMIT
+
+
+def change_followers(author_id, delta):
+    counters.shift(
+        AuthorStats.objects.filter(user_id=author_id),
+        'followers_count', delta,
+    )
+
+
+def fan_out(posts):
+    """Записывает новые посты в ленты подписчиков их авторов.
+
+    Посты популярных авторов пропускаются: их подмешивает Timeline
+    при чтении. bulk_create на SQLite не возвращает id, поэтому
+    такие посты находит saved_rows().
+    """
+    authors = {post.author_id for post in posts}
+    celebrities = set(AuthorStats.objects.filter(
+        user_id__in=authors,
+        followers_count__gte=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True))
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+        author_id__in=authors - celebrities
+    ).values_list('author_id', 'user_id'):
+        followers[author_id].append(user_id)
+    if not followers:
+        return
+
+    posts = [post for post in posts if post.author_id in followers]
+    if all(post.pk is not None for post in posts):
+        rows = [(post.pk, post.author_id, post.pub_date) for post in posts]
+    else:
+        rows = saved_rows(posts)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id, post_id=post_id,
+                author_id=author_id, pub_date=pub_date,
+            )
+            for post_id, author_id, pub_date in rows
+            for user_id in followers[author_id]
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def saved_rows(posts):
+    """(id, автор, дата) постов, сохранённых bulk_create без id.
+
+    Посты ищутся по точным (автор, дата, текст) из пачки, а не по
+    нижней границе даты: импорт с историческими датами иначе
+    перечитывал бы всю историю автора на каждой пачке. Из
+    одинаковых постов берутся самые новые.
+    """
+    wanted = Counter(
+        (post.author_id, post.pub_date, post.text) for post in posts
+    )
+    authors = {post.author_id for post in posts}
+    dates = sorted({post.pub_date for post in posts})
+    rows = []
+    for start in range(0, len(dates), DATES_CHUNK):
+        candidates = Post.objects.filter(
+            author_id__in=authors,
+            pub_date__in=dates[start:start + DATES_CHUNK],
+        ).order_by('-pk').values_list('pk', 'author_id', 'pub_date', 'text')
+        for post_id, author_id, pub_date, text in candidates:
+            key = (author_id, pub_date, text)
+            if wanted[key] > 0:
+                wanted[key] -= 1
+                rows.append((post_id, author_id, pub_date))
+    return rows
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние посты автора."""
+    followers = AuthorStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+    if is_celebrity(followers):
+        return
+    recent = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id, post_id=post_id,
+                author_id=author_id, pub_date=pub_date,
+            )
+            for post_id, pub_date in recent
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def drop(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+class Timeline:
+    """Лента подписок для CountedPaginator.
+
+    Разложенные при публикации записи и посты популярных авторов
+    сливаются одним UNION ALL с общим порядком по дате, поэтому
+    страница читается по индексам обеих таблиц без сортировки всей
+    ленты. Записи автора, ставшего популярным после публикации,
+    пропускаются, чтобы посты не задваивались.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._celebrities = None
+
+    @property
+    def celebrities(self):
+        if self._celebrities is None:
+            self._celebrities = list(Follow.objects.filter(
+                user=self.user,
+                author__post_stats__followers_count__gte=(
+                    settings.TIMELINE_FANOUT_LIMIT
+                ),
+            ).values_list('author_id', flat=True))
+        return self._celebrities
+
+    def _entries(self):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        if self.celebrities:
+            entries = entries.exclude(author_id__in=self.celebrities)
+        return entries
+
+    def count(self):
+        total = self._entries().count()
+        if self.celebrities:
+            total += AuthorStats.objects.filter(
+                user_id__in=self.celebrities
+            ).aggregate(total=Sum('posts_count'))['total'] or 0
+        return total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Timeline поддерживает только срезы')
+        ids = self._entries().order_by().values_list('post_id', 'pub_date')
+        if self.celebrities:
+            ids = ids.union(
+                Post.objects.filter(
+                    author_id__in=self.celebrities
+                ).order_by().values_list('pk', 'pub_date'),
+                all=True,
+            )
+        ids = [
+            post_id for post_id, _ in
+            ids.order_by('-pub_date', '-post_id')[index]
+        ]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
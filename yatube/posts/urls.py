@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -9,10 +9,61 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='posts_by_groups'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
+    # Ленты RSS, Atom и JSON Feed
+    path('feed/', feeds.index_feed, name='feed'),
+    path('group/<slug:slug>/feed/', feeds.group_feed, name='group_feed'),
+    path(
+        'profile/<str:username>/feed/',
+        feeds.profile_feed,
+        name='profile_feed',
+    ),
+    # Архив по годам и месяцам: всей ленты, сообщества, автора
+    path('archive/<int:year>/', views.archive_index, name='archive_year'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive_index,
+        name='archive_month',
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/',
+        views.group_archive,
+        name='group_archive_year',
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive_month',
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/',
+        views.profile_archive,
+        name='profile_archive_year',
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.profile_archive,
+        name='profile_archive_month',
+    ),
+    # Поиск по постам
+    path('search/', views.search, name='search'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    # Группы для поля формы поста
+    path('groups/search/', views.group_search, name='group_search'),
     # Создание поста
     path('create/', views.post_create, name='post_create'),
     # Редактирование поста
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    # Подписки
+    path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow',
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow',
+    ),
 ]
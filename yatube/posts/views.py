@@ -1,64 +1,228 @@
-from django.contrib.auth import get_user_model
+from datetime import date
+from functools import partial
+
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .common import paginator
+from . import archive, choices, counters, lookups
+from .cache import (archive_scope, cache_listing, conditional_page,
+                    group_slug_scope, main_scope, post_scope,
+                    username_scope)
+from .common import CURSOR_PARAM, page_query, paginator
 from .forms import PostForm
-from .models import Group, Post
+from .models import Follow, Post
+from .search import SearchPaginator
+from .timeline import Timeline
 
 AMOUNT = 10
-User = get_user_model()
 
 
+@conditional_page(main_scope)
+@cache_listing(main_scope)
 def index(request):
 
     template = 'posts/index.html'
-    post_list = Post.objects.select_related()
+    post_list = Post.objects.select_related('author', 'group')
     text = 'Это главная страница проекта Yatube'
     title = 'Main page'
 
     context = {
         'text': text,
         'title': title,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': paginator(
+            request,
+            post_list,
+            AMOUNT,
+            count=partial(counters.posts_count, counters.ALL, post_list),
+        ),
+        'archive': archive.sidebar(archive.months(counters.ALL), 'archive'),
     }
     return render(request, template, context)
 
 
+@conditional_page(group_slug_scope)
+@cache_listing(group_slug_scope)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = lookups.groups.get(slug)
+    post_list = group.posts.select_related('author')
 
     context = {
         'title': 'Сообщества',
         'group': group,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': paginator(
+            request,
+            post_list,
+            AMOUNT,
+            count=group.posts_count,
+        ),
+        'archive': archive.sidebar(
+            archive.months(counters.group_scope(group.pk)),
+            'group_archive', slug,
+        ),
     }
     return render(request, template, context)
 
 
+@conditional_page(username_scope)
+@cache_listing(username_scope)
 def profile(request, username):
     template = 'posts/profile.html'
-    user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
-    posts_count = post_list.count()
+    user = lookups.authors.get(username)
+    post_list = user.posts.select_related('group')
+    posts_count = counters.author_count(user)
     title = f'Профайл пользователя {username}'
+    following = (
+        request.user.is_authenticated
+        and request.user != user
+        and Follow.objects.filter(user=request.user, author=user).exists()
+    )
 
     context = {
         'posts_count': posts_count,
+        'following': following,
         'title': title,
-        'page_obj': paginator(request, post_list, AMOUNT),
+        'page_obj': paginator(
+            request, post_list, AMOUNT, count=posts_count
+        ),
         'author': user,
+        'archive': archive.sidebar(
+            archive.months(counters.author_scope(user.pk)),
+            'profile_archive', username,
+        ),
+    }
+    return render(request, template, context)
+
+
+def archive_context(request, scope, post_list, year, month, url_prefix,
+                    *args):
+    """Посты области за год или месяц и колонка архива.
+
+    Количество постов берётся из месячных счётчиков archive,
+    а посты выбираются по диапазону pub_date — по индексу.
+    """
+    try:
+        start, end = archive.period(year, month)
+    except (OverflowError, ValueError):
+        raise Http404('Нет такого периода')
+    month_counts = archive.months(scope)
+    post_list = post_list.filter(pub_date__gte=start, pub_date__lt=end)
+    return {
+        'year': year,
+        'month': date(year, month, 1) if month else None,
+        'page_obj': paginator(
+            request,
+            post_list,
+            AMOUNT,
+            count=archive.posts_count(month_counts, year, month),
+        ),
+        'archive': archive.sidebar(month_counts, url_prefix, *args),
+    }
+
+
+@conditional_page(archive_scope(main_scope))
+@cache_listing(archive_scope(main_scope))
+def archive_index(request, year, month=None):
+    context = archive_context(
+        request,
+        counters.ALL,
+        Post.objects.select_related('author', 'group'),
+        year,
+        month,
+        'archive',
+    )
+    context['title'] = context['heading'] = 'Архив'
+    return render(request, 'posts/archive.html', context)
+
+
+@conditional_page(archive_scope(group_slug_scope))
+@cache_listing(archive_scope(group_slug_scope))
+def group_archive(request, slug, year, month=None):
+    group = lookups.groups.get(slug)
+    context = archive_context(
+        request,
+        counters.group_scope(group.pk),
+        group.posts.select_related('author'),
+        year,
+        month,
+        'group_archive',
+        slug,
+    )
+    context['title'] = context['heading'] = f'Архив сообщества {group}'
+    context['group'] = group
+    return render(request, 'posts/archive.html', context)
+
+
+@conditional_page(archive_scope(username_scope))
+@cache_listing(archive_scope(username_scope))
+def profile_archive(request, username, year, month=None):
+    user = lookups.authors.get(username)
+    context = archive_context(
+        request,
+        counters.author_scope(user.pk),
+        user.posts.select_related('author', 'group'),
+        year,
+        month,
+        'profile_archive',
+        username,
+    )
+    context['title'] = context['heading'] = (
+        f'Архив пользователя {username}'
+    )
+    context['author'] = user
+    return render(request, 'posts/archive.html', context)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = lookups.groups.get(request.GET['group'])
+    if request.GET.get('author'):
+        author = lookups.authors.get(request.GET['author'])
+
+    search_paginator = SearchPaginator(
+        query,
+        AMOUNT,
+        group_id=group.pk if group else None,
+        author_id=author.pk if author else None,
+    )
+    context = {
+        'title': 'Поиск',
+        'query': query,
+        'group': group,
+        'author': author,
+        'page_obj': search_paginator.get_page(
+            request.GET.get(CURSOR_PARAM)
+        ),
+        'page_query': page_query(request),
     }
     return render(request, template, context)
 
 
+def group_search(request):
+    """Группы для поля формы поста по части названия, в JSON."""
+    query = request.GET.get('q', '').strip()
+    groups = choices.search_groups(query) if query else []
+    return JsonResponse({
+        'results': [
+            {'id': group_id, 'title': title} for group_id, title in groups
+        ],
+    })
+
+
+@conditional_page(post_scope)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__post_stats', 'group'),
+        pk=post_id,
+    )
     context = {
         'post': post,
+        'posts_count': counters.author_count(post.author),
     }
     return render(request, template, context)
 
@@ -68,7 +232,7 @@ def post_create(request):
     template = 'posts/create_post.html'
 
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
 
         if form.is_valid():
             post = form.save(commit=False)
@@ -95,11 +259,13 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     current_user = request.user
 
-    if current_user != post.author:
+    if current_user.pk != post.author_id:
         return redirect('posts:post_detail', post_id)
 
     if request.method == 'POST':
-        form = PostForm(request.POST, instance=post)
+        form = PostForm(
+            request.POST, files=request.FILES or None, instance=post
+        )
 
         if form.is_valid():
             post = form.save(commit=False)
@@ -111,11 +277,40 @@ def post_edit(request, post_id):
             'title': 'Редактировать пост',
             'is_edit': True,
             'post': post,
+            'post_id': post_id,
         })
-    form = PostForm()
+    form = PostForm(instance=post)
     return render(request, template, {
         'form': form,
         'title': 'Редактировать пост',
         'is_edit': True,
         'post_id': post_id,
     })
+
+
+@login_required
+def follow_index(request):
+    template = 'posts/follow.html'
+    timeline = Timeline(request.user)
+    context = {
+        'title': 'Избранные авторы',
+        'page_obj': paginator(
+            request, timeline, AMOUNT, count=timeline.count
+        ),
+    }
+    return render(request, template, context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = lookups.authors.get(username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = lookups.authors.get(username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('posts:profile', username)
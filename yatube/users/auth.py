@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.utils.crypto import constant_time_compare
+
+from core.ttlcache import TTLCache
+
+User = get_user_model()
+
+# Ключ сессии -> (id, бэкенд, хеш сессии, (база, поля, значения))
+users = TTLCache(settings.AUTH_USER_CACHE_SIZE)
+
+
+def get_user(request):
+    """Пользователь сессии с кешем процесса на AUTH_USER_CACHE_TIMEOUT.
+
+    Сами данные сессии читаются каждый раз, поэтому выход в другом
+    процессе сразу делает запись недействительной. Хранятся значения
+    полей, а не объект: каждый запрос получает свой экземпляр User.
+    """
+    session = request.session
+    key = session.session_key
+    if key is None:
+        return auth.get_user(request)
+    cached = users.get(key, None)
+    if cached is not None:
+        user_id, backend, session_hash, row = cached
+        if (session.get(SESSION_KEY) == user_id
+                and session.get(BACKEND_SESSION_KEY) == backend
+                and constant_time_compare(
+                    session.get(HASH_SESSION_KEY) or '', session_hash)):
+            return User.from_db(*row)
+        users.discard(key)
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        names = [field.attname for field in user._meta.concrete_fields]
+        users.set(
+            key,
+            (
+                session[SESSION_KEY],
+                session[BACKEND_SESSION_KEY],
+                user.get_session_auth_hash(),
+                (user._state.db, names, [getattr(user, n) for n in names]),
+            ),
+            settings.AUTH_USER_CACHE_TIMEOUT,
+        )
+    return user
+
+
+def forget_user(user):
+    """Удаляет из кеша все сессии пользователя."""
+    user_id = user._meta.pk.value_to_string(user)
+    users.discard_where(lambda cached: cached[0] == user_id)
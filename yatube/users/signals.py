@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth
+
+User = get_user_model()
+
+
+@receiver(user_logged_out)
+def forget_logged_out(sender, request, user, **kwargs):
+    auth.users.discard(request.session.session_key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    """Смена пароля, last_login и любых полей сбрасывает кеш."""
+    auth.forget_user(instance)
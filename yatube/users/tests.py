@@ -1,3 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from . import auth
 
-# Create your tests here.
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='Cached', password='old-password', first_name='Old'
+        )
+
+    def setUp(self):
+        auth.users.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def queries(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.url)
+        return response, [query['sql'] for query in queries]
+
+    def current_user(self, client):
+        return client.get(self.url).context['user']
+
+    def test_repeated_requests_skip_session_and_user_tables(self):
+        """Авторизованный запрос не читает django_session и auth_user"""
+        first, cold = self.queries(self.client)
+        self.assertTrue(first.context['user'].is_authenticated)
+        self.assertTrue(cold)
+        response, warm = self.queries(self.client)
+        self.assertEqual(response.context['user'].pk, self.user.pk)
+        self.assertEqual(warm, [])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookie_sessions(self):
+        client = Client()
+        client.force_login(self.user)
+        self.queries(client)
+        response, warm = self.queries(client)
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(warm, [])
+
+    def test_user_change_invalidates_cache(self):
+        self.current_user(self.client)
+        self.user.first_name = 'New'
+        self.user.save()
+        self.assertEqual(self.current_user(self.client).first_name, 'New')
+
+    def test_logout_invalidates_cache(self):
+        self.current_user(self.client)
+        self.client.get(reverse('users:logout'))
+        self.assertEqual(len(auth.users), 0)
+        self.assertFalse(self.current_user(self.client).is_authenticated)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля другие сессии не берут пользователя из кеша"""
+        other = Client()
+        other.force_login(self.user)
+        self.assertTrue(self.current_user(other).is_authenticated)
+        self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-password',
+            'new_password1': 'Nov9-parol-dlinnyi',
+            'new_password2': 'Nov9-parol-dlinnyi',
+        })
+        self.assertTrue(self.current_user(self.client).is_authenticated)
+        self.assertFalse(self.current_user(other).is_authenticated)
@@ -51,11 +51,16 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,9 +95,124 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Применяются к каждому новому соединению с SQLite (core.signals).
+# WAL позволяет читать во время записи, NORMAL в WAL не теряет
+# целостность, busy_timeout ждёт блокировку вместо ошибки
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики для чтения. Локально реплику заменяет второй файл SQLite:
+# скопируйте db.sqlite3 и укажите путь в YATUBE_REPLICA_DB. Без него
+# псевдоним replica смотрит в основную базу и не используется, а в
+# тестах он зеркало default
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.environ.get('YATUBE_REPLICA_DB', DATABASES['default']['NAME']),
+    'CONN_MAX_AGE': 60,
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_REPLICAS = ['replica'] if os.environ.get('YATUBE_REPLICA_DB') else []
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Представления, которые только читают и могут идти в реплику
+REPLICA_VIEWS = {
+    'posts:main_page',
+    'posts:posts_by_groups',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+}
+# Сколько секунд после записи клиент читает из основной базы
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# Для нескольких процессов подойдёт файловый кеш:
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': os.path.join(BASE_DIR, 'cache'),
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Хранилище ключей sorl.thumbnail: очистка кеша страниц его не трогает
+    'thumbnails': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'thumbnails',
+    },
+    # Сессии cached_db: очистка кеша страниц не разлогинивает
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+
+# Хранение сессий: cached_db — база с кешем 'sessions' перед ней,
+# signed_cookies — подписанная cookie без обращений к серверу.
+# Выбирается переменной окружения YATUBE_SESSIONS
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get('YATUBE_SESSIONS', 'cached_db')
+]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Пользователь сессии кешируется в памяти процесса на столько секунд;
+# выход, смена пароля и любое сохранение пользователя сбрасывают кеш
+AUTH_USER_CACHE_TIMEOUT = 30
+AUTH_USER_CACHE_SIZE = 10_000
+
+# Кеш отрисованных страниц ленты для гостей; 0 отключает
+POSTS_PAGE_CACHE = 'default'
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Посты авторов с таким числом подписчиков не раскладываются
+# по лентам при публикации, а подмешиваются при чтении
+TIMELINE_FANOUT_LIMIT = 1000
+# Сколько последних постов автора получает новый подписчик
+TIMELINE_BACKFILL = 100
+
+# Кеш процесса для поиска группы по slug и автора по username;
+# отсутствующие адреса помнятся меньше, чтобы новые появлялись быстрее
+LOOKUP_CACHE_SIZE = 1000
+LOOKUP_CACHE_TIMEOUT = 300
+LOOKUP_CACHE_NEGATIVE_TIMEOUT = 10
+
+# Для большого каталога групп: форма поста выводит только выбранную
+# группу, остальные подбираются поиском по мере ввода
+GROUP_SEARCH = False
+
+# Server-Timing и строка лога core.timing на каждый запрос
+REQUEST_TIMING = True
+
+# Сжатие ответов: уровень gzip 1–9, качество brotli 0–11 (br — только
+# при установленном пакете brotli), ответы короче порога не сжимаются
+RESPONSE_COMPRESSION = True
+COMPRESSION_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_MIN_SIZE = 200
+
+# Профили запросов: ?_profile=stats|collapsed|save для сотрудников
+# и доля обычных запросов, сохраняемых в PROFILE_DIR
+REQUEST_PROFILING = True
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_KEEP = 100
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -132,6 +252,14 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Имена с хешем содержимого и сжатые копии .gz (и .br, если
+# установлен пакет brotli) пишет collectstatic
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Собранную статику отдаёт PrecompressedStaticMiddleware
+SERVE_STATIC = True
+STATIC_MAX_AGE = 60
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main_page'
 # LOGOUT_REDIRECT_URL = 'posts:main_page'
@@ -144,4 +272,10 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры создаются в фоне после загрузки (posts.thumbnails),
+# страницы находят их в кешированном хранилище ключей
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE = 'thumbnails'
+THUMBNAIL_WORKERS = 2
+
 AMOUNT_TITLE = 15